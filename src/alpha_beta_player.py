@@ -1,35 +1,232 @@
-import copy
 import time
 from read import readInput
 from write import writeOutput
 
-from host import GO
+from go_board import GO
+from transposition_table import TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND
+
+
+TT_MEMORY_MB = 64
+
+
+class SearchTimeout(Exception):
+    """
+    Raised inside the search when the deadline of the current move has passed.
+    """
 
 
 class AlphaBetaPlayer():
-    def __init__(self):
-        self.type = 'alpha-beta'
+    def __init__(self, tt_memory_mb=TT_MEMORY_MB, move_ordering=True):
+        """
+        Method to initialize the alpha-beta player.
+
+        Args:
+            tt_memory_mb(float): Memory budget of the transposition table in megabytes. Defaults to 64.
+            move_ordering(bool): Whether to order the actions of every node (stored best action, captures and atari
+                saves, killer actions, history heuristic) instead of trying them in raster order. Defaults to True.
 
-    def get_agent_action(self, go, piece_type, max_depth=3):
         """
-        Method to get the action to be performed by the agent. Uses the alpha-beta pruning algorithm to get the optimal
-        action (depth-limited).
+        self.type = 'alpha-beta'
+        # The table is kept for the lifetime of the player, so later moves reuse the positions already searched.
+        self.transposition_table = TranspositionTable(tt_memory_mb)
+        self.deadline = None
+        self.nodes = 0
+        self.completed_depth = 0
+        self.move_ordering = move_ordering
+        self.killers = {} # Ply -> last two actions that caused a cutoff at that ply
+        self.history = [[], [], []] # Piece type -> cutoff score of each point
+        self.ponder_thread = None
+        self.ponder_action = None # Best reply of the opponent found by the last pondering
+        self.ponder_prepared = False # Whether the last pondering already reset the search state for the next move
+
+    def get_agent_action(self, go, piece_type, max_depth=3, time_limit=None):
+        """
+        Method to get the action to be performed by the agent. Uses the alpha-beta pruning algorithm with iterative
+        deepening to get the optimal action (depth-limited). Every iteration searches one step deeper, starting with the
+        best action of the previous one.
 
         Args:
             go(GO): Instance of the Go board.
             piece_type(int): Type of piece the player agent is playing as. 1('X') or 2('O').
             max_depth(int): Max steps to look ahead in the game state tree for. Defaults to 3.
+            time_limit(float): Seconds the search may take. When they run out, the action of the deepest fully searched
+                iteration is returned. The first iteration is always completed. Defaults to None (no limit).
 
         Returns:
             (row, column): Co-ordinates of the board to place the agent's piece at. Returns "PASS" instead if no valid
                 placement is possible.
 
         """
-        action, _ = self.max_action(go, piece_type, max_depth, float("-inf"), float("inf"))
+        start = time.time()
+        self.stop_pondering()
+        if self.ponder_prepared:
+            # The pondering searched on behalf of this move, so the table and the history are not aged again. Its
+            # killer actions were found at other plies.
+            self.killers = {}
+            self.ponder_prepared = False
+        else:
+            self.prepare_search(go)
+        self.deadline = None
+        self.nodes = 0
+        self.completed_depth = 0
+        undo_depth = len(go.undo_stack)
+
+        action = "PASS"
+        for depth in range(1, max_depth + 1):
+            try:
+                action, _ = self.search_root(go, piece_type, depth, action)
+            except SearchTimeout:
+                # Take back the moves of the interrupted iteration.
+                while len(go.undo_stack) > undo_depth:
+                    go.unmake_move()
+                break
+
+            self.completed_depth = depth
+            if time_limit is not None:
+                self.deadline = start + time_limit
+
+        self.deadline = None
+        return action
+
+
+    def start_pondering(self, go, piece_type, max_depth):
+        """
+        Method to search on the opponent's time, from a background thread, until stop_pondering is called. The
+        predicted reply of the opponent is played and the agent's answer to it is searched, which fills the
+        transposition table for the next move. The GO instance belongs to the thread until pondering stops.
+
+        Args:
+            go(GO): Instance of the Go board after the agent's move.
+            piece_type(int): Type of piece the agent is playing as. 1('X') or 2('O').
+            max_depth(int): Max steps to look ahead in the game state tree for, from the agent's move.
+
+        """
+        import threading # Only the engine daemon ponders, so the per move script does not load it
+
+        self.stop_pondering()
+        # Nodes check the deadline, so setting it to 0 from another thread interrupts the search.
+        self.deadline = float("inf")
+        self.ponder_action = None
+        self.ponder_thread = threading.Thread(target=self.ponder, args=(go, piece_type, max_depth), daemon=True)
+        self.ponder_thread.start()
+
+
+    def ponder(self, go, piece_type, max_depth):
+        """
+        Method run by the pondering thread. The predicted reply is the best action of the opponent stored in the
+        transposition table by the last search, or found by predict_reply. The answer to it is searched with iterative
+        deepening as in get_agent_action, without a time limit. The search state is reset here once for the next move,
+        so get_agent_action does not reset it again.
+
+        Args:
+            go(GO): Instance of the Go board after the agent's move.
+            piece_type(int): Type of piece the agent is playing as. 1('X') or 2('O').
+            max_depth(int): Max steps to look ahead in the game state tree for, from the agent's move.
+
+        """
+        self.prepare_search(go)
+        self.ponder_prepared = True
+        self.nodes = 0
+        self.completed_depth = 0
+        undo_depth = len(go.undo_stack)
+
+        # Entries of the positions where the opponent is to move hold its best action.
+        entry = self.transposition_table.probe(go.search_key(3 - piece_type))
+        predicted = entry[3] if entry is not None and entry[3] is not None else self.predict_reply(go, piece_type)
+        if predicted != "PASS":
+            if not go.make_move(predicted[0], predicted[1], 3 - piece_type):
+                return
+            undo_depth = len(go.undo_stack)
+        self.ponder_action = predicted
+
+        try:
+            action = "PASS"
+            for depth in range(1, max_depth):
+                action, _ = self.search_root(go, piece_type, depth, action)
+                self.completed_depth = depth
+        except SearchTimeout:
+            while len(go.undo_stack) > undo_depth:
+                go.unmake_move()
+
+
+    def predict_reply(self, go, piece_type):
+        """
+        Method to predict the reply of the opponent with a one step search that leaves the transposition table and the
+        move ordering statistics untouched.
+
+        Args:
+            go(GO): Instance of the Go board after the agent's move.
+            piece_type(int): Type of piece the agent is playing as. 1('X') or 2('O').
 
+        Returns:
+            (action): Action of the opponent with the best utility value for it, "PASS" if no placement is valid.
+
+        """
+        opponent = 3 - piece_type
+        action = "PASS"
+        best_value = float("-inf")
+        for i, j in go.legal_moves(opponent):
+            go.make_move(i, j, opponent)
+            value = self.get_utility_value(go, opponent)
+            go.unmake_move()
+            if value > best_value:
+                action, best_value = (i, j), value
         return action
 
 
+    def stop_pondering(self):
+        """
+        Method to interrupt the pondering thread and wait for it to take back its moves.
+
+        Returns:
+            (pondered): Whether a pondering thread was running.
+
+        """
+        if self.ponder_thread is None:
+            return False
+        self.deadline = 0
+        self.ponder_thread.join()
+        self.ponder_thread = None
+        self.deadline = None
+        return True
+
+
+    def prepare_search(self, go):
+        """
+        Method to reset the search state before searching a new position.
+
+        Args:
+            go(GO): Instance of the Go board.
+
+        """
+        self.transposition_table.new_search()
+
+        # Killer actions only apply to the current position, history scores fade from one move to the next.
+        self.killers = {}
+        for side in (1, 2):
+            if len(self.history[side]) != go.size * go.size:
+                self.history[side] = [0] * (go.size * go.size)
+            else:
+                self.history[side] = [score // 2 for score in self.history[side]]
+
+
+    def search_root(self, go, piece_type, depth, first_action=None):
+        """
+        Method to run one iteration of the search from the current position.
+
+        Args:
+            go(GO): Instance of the Go board.
+            piece_type(int): Type of piece the player agent is playing as. 1('X') or 2('O').
+            depth(int): Number of steps to look ahead in the game state tree for.
+            first_action(tuple): Action to try first, usually the best action of the previous iteration.
+
+        Returns:
+            ((row, column), value): Best action and its utility value.
+
+        """
+        return self.max_action(go, piece_type, depth, float("-inf"), float("inf"), first_action)
+
+
     def get_utility_value(self, go, piece_type):
         """
         Method to get the utility value of the board for a given piece type.
@@ -46,28 +243,9 @@ class AlphaBetaPlayer():
         player_score = go.score(piece_type)
         opponent_score = go.score(3 - piece_type)
 
-        # Additional score where amount of liberty for each pawn group is added to the utility value.
-        player_liberty_score = 0
-        opponent_liberty_score = 0
-        visited = [[False for _ in range(go.size)] for _ in range(go.size)]
-
-        for i in range(go.size):
-            for j in range(go.size):
-                if not visited[i][j] and go.board[i][j] != 0:
-                    allies = go.ally_dfs(i, j)
-
-                    for ally in allies:
-                        visited[ally[0]][ally[1]] = True
-                        neighbours = go.detect_neighbor(ally[0], ally[1])
-
-                        for neighbour in neighbours:
-                            if go.board[neighbour[0]][neighbour[1]] == 0:
-                                visited_liberty[neighbour[0]][neighbour[1]] = True
-                                if go.board[ally[0]][ally[1]] == piece_type:
-                                    player_liberty_score += 1
-                                else:
-                                    opponent_liberty_score += 1
-
+        # Additional score where every empty point next to a player's pieces counts once as a liberty of that player.
+        player_liberty_score = go.unique_liberties(piece_type)
+        opponent_liberty_score = go.unique_liberties(3 - piece_type)
 
         # If the player is white, add the komi value to the player score, else add it to the opponent's score.
         return player_score + player_liberty_score + go.komi - (opponent_score + opponent_liberty_score) \
@@ -75,7 +253,7 @@ class AlphaBetaPlayer():
                player_score + player_liberty_score - (opponent_score + opponent_liberty_score + go.komi)
 
 
-    def max_action(self, go, piece_type, depth=0, alpha=float("-inf"), beta=float("inf")):
+    def max_action(self, go, piece_type, depth=0, alpha=float("-inf"), beta=float("inf"), first_action=None):
         """
         Method to get the action that maximizes the reward for a piece type.
 
@@ -85,21 +263,30 @@ class AlphaBetaPlayer():
             depth(int): Number of steps to look ahead in the game state tree for. Defaults to 0.
             alpha(float): Alpha value used in the alpha-beta pruning algorithm. Defaults to float("-inf").
             beta(float): Beta value used in the alpha-beta pruning algorithm. Defaults to float("-inf").
+            first_action(tuple): Action to try first when the transposition table has none. Defaults to None.
 
         Returns:
             ((row, column), value): Action and utility value for board when the action is executed.
 
         """
+        self.nodes += 1
+        if self.deadline is not None and time.time() > self.deadline:
+            raise SearchTimeout()
+
         if (depth == 0):
             return "PASS", self.get_utility_value(go, piece_type)
 
-        # Getting the possible actions for the agent.
-        actions = []
-        for i in range(go.size):
-            for j in range(go.size):
-                actions.append((i,j))
-                #if go.valid_place_check(i, j, piece_type, test_check = True):
-                #    actions.append((i,j))
+        # Use the stored result if the position was already searched deep enough.
+        key = go.search_key(piece_type)
+        tt_move, tt_value = self.probe_transposition(key, depth, alpha, beta)
+        if tt_value is not None:
+            return tt_move, tt_value
+        if tt_move is None and first_action != "PASS":
+            tt_move = first_action
+        alpha_original = alpha
+
+        # Getting the possible actions for the agent, starting with the stored best move.
+        actions = self.get_ordered_actions(go, piece_type, tt_move)
 
         # If no valid action exists, simply pass.
         #if not actions:
@@ -109,24 +296,23 @@ class AlphaBetaPlayer():
         a = "PASS"
         v = float("-inf")
         for action in actions:
-            test_go = copy.deepcopy(go)
-            success = test_go.place_chess(action[0], action[1], piece_type)
-
-            if not success:
+            if not go.make_move(action[0], action[1], piece_type):
                 continue
 
-            test_go.remove_died_pieces(3 - piece_type)
-
-            _, action_value = self.min_action(test_go, piece_type, depth - 1, alpha, beta)
+            _, action_value = self.min_action(go, piece_type, depth - 1, alpha, beta)
+            go.unmake_move()
 
             a = action if action_value > v else a
             v = max(v, action_value)
 
             if (v >= beta):
+                self.record_cutoff(go, piece_type, action, depth)
+                self.store_transposition(key, depth, a, v, alpha_original, beta)
                 return a, v
 
             alpha = max(alpha, v)
 
+        self.store_transposition(key, depth, a, v, alpha_original, beta)
         return a, v
 
 
@@ -145,16 +331,23 @@ class AlphaBetaPlayer():
             ((row, column), value): Action and utility value for board when the action is executed.
 
         """
+        self.nodes += 1
+        if self.deadline is not None and time.time() > self.deadline:
+            raise SearchTimeout()
+
         if (depth == 0):
             return "PASS", self.get_utility_value(go, piece_type)
 
-        # Getting the possible actions for the opponent agent.
-        actions = []
-        for i in range(go.size):
-            for j in range(go.size):
-                actions.append((i,j))
-                #if go.valid_place_check(i, j, 3 - piece_type, test_check = True):
-                #    actions.append((i,j))
+        # Use the stored result if the position was already searched deep enough. The table holds values from the
+        # point of view of the side to move, here the opponent, so the window and the value are negated.
+        key = go.search_key(3 - piece_type)
+        tt_move, tt_value = self.probe_transposition(key, depth, -beta, -alpha)
+        if tt_value is not None:
+            return tt_move, -tt_value
+        beta_original = beta
+
+        # Getting the possible actions for the opponent agent, starting with the stored best move.
+        actions = self.get_ordered_actions(go, 3 - piece_type, tt_move)
 
         # If no valid action exists, simply pass.
         #if not actions:
@@ -164,27 +357,169 @@ class AlphaBetaPlayer():
         a = "PASS"
         v = float("inf")
         for action in actions:
-            test_go = copy.deepcopy(go)
-            success = test_go.place_chess(action[0], action[1], 3 - piece_type)
-
-            if not success:
+            if not go.make_move(action[0], action[1], 3 - piece_type):
                 continue
 
-            test_go.remove_died_pieces(piece_type)
+            _, action_value = self.max_action(go, piece_type, depth - 1, alpha, beta)
+            go.unmake_move()
 
-            _, action_value = self.max_action(test_go, piece_type, depth - 1, alpha, beta)
-
-            a = action if action_value > v else a
+            a = action if action_value < v else a
             v = min(v, action_value)
 
             if (v <= alpha):
+                self.record_cutoff(go, 3 - piece_type, action, depth)
+                self.store_transposition(key, depth, a, -v, -beta_original, -alpha)
                 return a, v
 
             beta = min(beta, v)
 
+        self.store_transposition(key, depth, a, -v, -beta_original, -alpha)
         return a, v
 
 
+    def get_ordered_actions(self, go, piece_type, first_action=None):
+        """
+        Method to get the actions to search at a node. With move ordering, only the valid actions are returned: the
+        first action, then captures and atari saves, then the killer actions of the ply, then the rest by history score.
+        Without it, every point of the board is returned in raster order after the first action.
+
+        Args:
+            go(GO): Instance of the Go board.
+            piece_type(int): Type of piece to move. 1('X') or 2('O').
+            first_action(tuple): Action to try first. Defaults to None.
+
+        Returns:
+            (actions): List of actions in the order to search them.
+
+        """
+        if not self.move_ordering:
+            actions = [] if first_action is None else [first_action]
+            for i in range(go.size):
+                for j in range(go.size):
+                    if (i, j) != first_action:
+                        actions.append((i, j))
+            return actions
+
+        # Liberties of the groups in atari: taking one captures an enemy group, extending into one saves an own group.
+        captures = 0
+        saves = 0
+        for group_type, _, liberties in go.groups.values():
+            if liberties and not liberties & (liberties - 1):
+                if group_type == piece_type:
+                    saves |= liberties
+                else:
+                    captures |= liberties
+
+        killers = self.killers.get(len(go.undo_stack), ())
+        history = self.get_history(go, piece_type)
+        point_masks = go.bitboard.point_masks
+        scores = {}
+        for action in go.legal_moves(piece_type):
+            p = action[0] * go.size + action[1]
+            if action == first_action:
+                score = 4 << 32
+            elif point_masks[p] & captures:
+                score = 3 << 32
+            elif point_masks[p] & saves:
+                score = 2 << 32
+            elif action in killers:
+                score = 1 << 32
+            else:
+                score = history[p]
+            scores[action] = score
+
+        return sorted(scores, key=scores.get, reverse=True)
+
+
+    def record_cutoff(self, go, piece_type, action, depth):
+        """
+        Method to remember an action that caused a cutoff, as a killer action of the ply and in the history scores.
+
+        Args:
+            go(GO): Instance of the Go board.
+            piece_type(int): Type of piece that played the action. 1('X') or 2('O').
+            action(tuple): Action that caused the cutoff.
+            depth(int): Remaining depth of the node the cutoff happened at.
+
+        """
+        if not self.move_ordering:
+            return
+
+        ply = len(go.undo_stack)
+        killers = self.killers.get(ply, [])
+        if action not in killers:
+            self.killers[ply] = [action] + killers[:1]
+        self.get_history(go, piece_type)[action[0] * go.size + action[1]] += depth * depth
+
+
+    def get_history(self, go, piece_type):
+        """
+        Method to get the history scores of a piece type, created on the first use for the size of the board, so the
+        search works without prepare_search.
+
+        Args:
+            go(GO): Instance of the Go board.
+            piece_type(int): Type of piece to move. 1('X') or 2('O').
+
+        Returns:
+            (history): List of the cutoff score of each point.
+
+        """
+        if len(self.history[piece_type]) != go.size * go.size:
+            self.history[piece_type] = [0] * (go.size * go.size)
+        return self.history[piece_type]
+
+
+    def probe_transposition(self, key, depth, alpha, beta):
+        """
+        Method to look up a position in the transposition table. Values are from the point of view of the side to
+        move, which the search key includes, so a player searching for both piece types reads back consistent values.
+
+        Args:
+            key(int): Search key of the position.
+            depth(int): Number of steps the position has to be searched for.
+            alpha(float): Alpha value of the search window, from the point of view of the side to move.
+            beta(float): Beta value of the search window, from the point of view of the side to move.
+
+        Returns:
+            (move, value): Stored best move (None if there is no usable move) and the stored value if it can be used
+                without searching the position again (None otherwise).
+
+        """
+        entry = self.transposition_table.probe(key)
+        if entry is None:
+            return None, None
+
+        entry_depth, value, bound, move = entry
+        if entry_depth >= depth and \
+                (bound == EXACT or (bound == LOWER_BOUND and value >= beta) or (bound == UPPER_BOUND and value <= alpha)):
+            self.transposition_table.cutoffs += 1
+            return move, value
+        return (None if move == "PASS" else move), None
+
+
+    def store_transposition(self, key, depth, action, value, alpha, beta):
+        """
+        Method to store the result of a search in the transposition table.
+
+        Args:
+            key(int): Search key of the position.
+            depth(int): Number of steps the position was searched for.
+            action(tuple): Best action found.
+            value(float): Value found by the search, from the point of view of the side to move.
+            alpha(float): Alpha value of the search window when the position was entered, from the same point of view.
+            beta(float): Beta value of the search window when the position was entered, from the same point of view.
+
+        """
+        if value <= alpha:
+            bound = UPPER_BOUND
+        elif value >= beta:
+            bound = LOWER_BOUND
+        else:
+            bound = EXACT
+        self.transposition_table.store(key, depth, value, bound, action)
+
+
 if __name__ == "__main__":
     N = 5
     piece_type, previous_board, board = readInput(N)
@@ -0,0 +1,266 @@
+import argparse
+import time
+
+import numpy as np
+
+
+class BatchGO():
+    """
+    Many Go games played in lockstep. The boards are stored as a (num_boards, n * n) NumPy array where the point (i, j)
+    is the column i * n + j, and every rule (liberties, captures, KO, game end and scoring) is applied to all the boards
+    at once with precomputed neighbor tables. The rules are the ones of GO: a placement needs a liberty after the
+    captures, a placement may not recreate the previous board, a PASS clears the KO and a game ends after max_move
+    moves.
+    """
+
+    def __init__(self, num_boards, n=5):
+        """
+        Method to initialize the boards.
+
+        Args:
+            num_boards(int): Number of boards.
+            n(int): Size of the boards. Defaults to 5.
+
+        """
+        self.num_boards = num_boards
+        self.size = n
+        self.num_points = n * n
+        self.pass_action = self.num_points # Action index of a PASS
+        self.max_move = n * n - 1
+        self.komi = n / 2
+
+        # neighbors[p] holds the 4 neighbors of point p, off-board neighbors point at an extra padding column.
+        neighbors = []
+        for p in range(self.num_points):
+            i, j = divmod(p, n)
+            neighbors.append([i2 * n + j2 if 0 <= i2 < n and 0 <= j2 < n else self.num_points
+                              for i2, j2 in ((i - 1, j), (i + 1, j), (i, j - 1), (i, j + 1))])
+        self.neighbors = np.array(neighbors)
+        self.rows = np.arange(num_boards)
+
+        self.init_board()
+
+    def init_board(self):
+        """
+        Method to empty all the boards.
+        """
+        self.board = np.zeros((self.num_boards, self.num_points), dtype=np.int8)
+        self.ko_points = np.full(self.num_boards, -1) # Point the player to move may not retake, -1 for none
+        self.ko_stones = np.full(self.num_boards, -1) # Stone a retake at the KO point would capture
+        self.n_move = 0
+
+    @property
+    def boards(self):
+        """
+        Boards as a (num_boards, n, n) array.
+        """
+        return self.board.reshape(self.num_boards, self.size, self.size)
+
+    def pad(self, values, padding):
+        """
+        Method to add the padding column read by off-board neighbors.
+
+        Args:
+            values(np.ndarray): (num_boards, n * n) array.
+            padding(int): Value of the padding column.
+
+        Returns:
+            (padded): (num_boards, n * n + 1) array.
+
+        """
+        return np.concatenate([values, np.full((len(values), 1), padding, dtype=values.dtype)], axis=1)
+
+    def adjacent(self, mask):
+        """
+        Method to get the points with a neighbor in a set of points, on every board.
+
+        Args:
+            mask(np.ndarray): (num_boards, n * n) boolean array of the set.
+
+        Returns:
+            (adjacent): (num_boards, n * n) boolean array.
+
+        """
+        return self.pad(mask, False)[:, self.neighbors].any(axis=2)
+
+    def group_labels(self):
+        """
+        Method to label the groups of stones of every board, by spreading the smallest point index of each group
+        through its stones.
+
+        Returns:
+            (labels): (num_boards, n * n) array of the label of the group of every stone, n * n for empty points.
+
+        """
+        board = self.board
+        stones = board > 0
+        labels = np.where(stones, np.arange(self.num_points), self.num_points)
+        same_color = (self.pad(board, -1)[:, self.neighbors] == board[:, :, None]) & stones[:, :, None]
+        while True:
+            neighbor_labels = np.where(same_color, self.pad(labels, self.num_points)[:, self.neighbors],
+                                       self.num_points)
+            spread = np.minimum(labels, neighbor_labels.min(axis=2))
+            if np.array_equal(spread, labels):
+                return labels
+            labels = spread
+
+    def legal_mask(self, piece_type):
+        """
+        Method to get the valid placements of a piece type on every board.
+
+        Args:
+            piece_type(int): 1('X') or 2('O').
+
+        Returns:
+            (legal): (num_boards, n * n) boolean array of the valid placements.
+
+        """
+        board = self.board
+        empty = board == 0
+        labels = self.group_labels()
+
+        neighbor_colors = self.pad(board, -1)[:, self.neighbors]
+        neighbor_labels = self.pad(labels, self.num_points)[:, self.neighbors]
+
+        # Liberties of every group: each empty point counts once for every distinct group around it.
+        counted = empty[:, :, None] & (neighbor_colors > 0)
+        for d in range(1, 4):
+            for e in range(d):
+                counted[:, :, d] &= ~(counted[:, :, e] & (neighbor_labels[:, :, e] == neighbor_labels[:, :, d]))
+        label_indexes = self.rows[:, None, None] * (self.num_points + 1) + neighbor_labels
+        liberties = np.bincount(label_indexes[counted], minlength=self.num_boards * (self.num_points + 1))
+        neighbor_liberties = liberties.reshape(self.num_boards, -1)[self.rows[:, None, None], neighbor_labels]
+
+        # A placement has a liberty if it has an empty neighbor, joins a friendly group with another liberty or
+        # captures an opponent group whose last liberty it takes.
+        has_empty_neighbor = (neighbor_colors == 0).any(axis=2)
+        joins_group = ((neighbor_colors == piece_type) & (neighbor_liberties >= 2)).any(axis=2)
+        captures = (neighbor_colors == 3 - piece_type) & (neighbor_liberties == 1)
+        legal = empty & (has_empty_neighbor | joins_group | captures.any(axis=2))
+
+        # A retake at the KO point is only valid if it also captures another group.
+        ko_boards = np.flatnonzero(self.ko_points >= 0)
+        ko_points = self.ko_points[ko_boards]
+        other_captures = captures[ko_boards, ko_points] & \
+            (neighbor_labels[ko_boards, ko_points] != self.ko_stones[ko_boards, None])
+        legal[ko_boards, ko_points] &= other_captures.any(axis=1)
+        return legal
+
+    def place_chess(self, actions, piece_type):
+        """
+        Method to play one move on every board and remove the opponent stones left without liberties.
+
+        Args:
+            actions(np.ndarray): (num_boards,) array of the point to place a stone at on every board, n * n for a PASS.
+                The placements must be valid.
+            piece_type(int): 1('X') or 2('O').
+
+        Returns:
+            (died_pieces): (num_boards,) array of the number of stones captured on every board.
+
+        """
+        board = self.board
+        placed = np.flatnonzero(actions != self.pass_action)
+        board[placed, actions[placed]] = piece_type
+
+        opponent = board == 3 - piece_type
+        alive = opponent & self.adjacent(board == 0)
+        while True:
+            spread = alive | (opponent & self.adjacent(alive))
+            if np.array_equal(spread, alive):
+                break
+            alive = spread
+        dead = opponent & ~alive
+        board[dead] = 0
+        died_pieces = dead.sum(axis=1)
+
+        # A single stone that captured a single stone and has no other liberty can be retaken at once.
+        self.ko_points[:] = -1
+        self.ko_stones[:] = -1
+        candidates = placed[died_pieces[placed] == 1]
+        stones = actions[candidates]
+        neighbor_colors = self.pad(board[candidates], -1)[self.rows[:len(candidates), None], self.neighbors[stones]]
+        is_ko = ((neighbor_colors == piece_type).sum(axis=1) == 0) & ((neighbor_colors == 0).sum(axis=1) == 1)
+        ko_boards = candidates[is_ko]
+        self.ko_points[ko_boards] = dead[ko_boards].argmax(axis=1)
+        self.ko_stones[ko_boards] = actions[ko_boards]
+
+        self.n_move += 1
+        return died_pieces
+
+    def game_end(self):
+        """
+        Method to check if the games should end. All the boards move in lockstep, so they end together.
+
+        Returns:
+            (end): Whether the max move is reached.
+
+        """
+        return self.n_move >= self.max_move
+
+    def score(self, piece_type):
+        """
+        Method to get the number of stones of a piece type on every board.
+
+        Args:
+            piece_type(int): 1('X') or 2('O').
+
+        Returns:
+            (scores): (num_boards,) array of stone counts.
+
+        """
+        return (self.board == piece_type).sum(axis=1)
+
+    def judge_winner(self):
+        """
+        Method to judge the winner of every board by number of stones, with komi for 'O'.
+
+        Returns:
+            (winners): (num_boards,) array of the piece type of the winner, 0 for a tie.
+
+        """
+        cnt_1 = self.score(1)
+        cnt_2 = self.score(2) + self.komi
+        return np.where(cnt_1 > cnt_2, 1, np.where(cnt_1 < cnt_2, 2, 0))
+
+
+def play_batch(num_games, player1, player2, board_size=5):
+    """
+    Method to play games between two agents on a batch of boards. The agents need a get_batch_actions method.
+
+    Args:
+        num_games(int): Number of games, one per board.
+        player1(GoPlayer): Agent playing 'X'.
+        player2(GoPlayer): Agent playing 'O'.
+        board_size(int): Size of the Go board. Defaults to 5.
+
+    Returns:
+        (results): (num_games,) array of the winner of every game, 0 for a tie.
+
+    """
+    batch = BatchGO(num_games, board_size)
+    piece_type = 1
+    while not batch.game_end():
+        player = player1 if piece_type == 1 else player2
+        batch.place_chess(player.get_batch_actions(batch, piece_type), piece_type)
+        piece_type = 3 - piece_type
+    return batch.judge_winner()
+
+
+if __name__ == "__main__":
+    from q_player import QPlayer, Q_TABLE_PATH
+    from random_player import RandomPlayer
+
+    parser = argparse.ArgumentParser(description="Measure the games per second of batched play.")
+    parser.add_argument("--games", "-g", type=int, help="number of games per batch", default=10000)
+    parser.add_argument("--q-table", "-q", help="Q table of the Q learning agent", default=Q_TABLE_PATH)
+    args = parser.parse_args()
+
+    matches = [("random vs random", RandomPlayer(), RandomPlayer()),
+               ("q-learner vs random", QPlayer(1, args.q_table, batch_learning=True), RandomPlayer())]
+    for name, player1, player2 in matches:
+        start = time.time()
+        results = play_batch(args.games, player1, player2)
+        elapsed = time.time() - start
+        print("{}: {:.0f} games/sec. X Wins: {}. O Wins: {}. Draws: {}".format(
+            name, args.games / elapsed, (results == 1).sum(), (results == 2).sum(), (results == 0).sum()))
@@ -0,0 +1,257 @@
+import random
+
+
+ZOBRIST_SEED = 561
+
+
+def _count_bits(mask):
+    return bin(mask).count("1")
+
+
+popcount = getattr(int, "bit_count", _count_bits)
+
+
+class BitBoard():
+    """
+    Precomputed bit masks for an n*n Go board. A set of points is stored as an integer where the point (i, j) is the bit
+    at index i * n + j, so neighbor, flood fill and liberty operations become shifts and masks over whole boards.
+    """
+
+    def __init__(self, n):
+        """
+        Method to initialize the bit masks for a board size.
+
+        Args:
+            n(int): Size of the board.
+
+        """
+        self.size = n
+        self.num_points = n * n
+        self.full_mask = (1 << self.num_points) - 1
+
+        first_column = 0
+        for i in range(n):
+            first_column |= 1 << (i * n)
+        self.not_first_column = self.full_mask & ~first_column
+        self.not_last_column = self.full_mask & ~(first_column << (n - 1))
+
+        self.points = [(p // n, p % n) for p in range(self.num_points)]
+        self.point_masks = [1 << p for p in range(self.num_points)]
+        self.neighbor_masks = [self.neighbors(mask) for mask in self.point_masks]
+        self.neighbor_points = [self.to_points(mask) for mask in self.neighbor_masks]
+        self.neighbor_indexes = [self.to_indexes(mask) for mask in self.neighbor_masks]
+
+        # Zobrist keys of each point for each piece type. The seed is fixed so that hashes match across processes.
+        rng = random.Random(ZOBRIST_SEED * n)
+        self.zobrist_keys = [[0] * self.num_points] + \
+                            [[rng.getrandbits(64) for _ in range(self.num_points)] for _ in range(2)]
+        # Keys of the side to move and of the point a KO recapture is forbidden on, used by search keys.
+        self.zobrist_side_keys = [0, rng.getrandbits(64), rng.getrandbits(64)]
+        self.zobrist_ko_keys = [rng.getrandbits(64) for _ in range(self.num_points)]
+
+    def __deepcopy__(self, memo):
+        # The masks are never mutated, so copies of a board can share them.
+        return self
+
+    def __reduce__(self):
+        # Boards sent to other processes use the masks cached there instead of pickling them.
+        return get_bitboard, (self.size,)
+
+    def index(self, i, j):
+        """
+        Method to get the bit index of a point.
+
+        Args:
+            i(int): Row number of the board.
+            j(int): Column number of the board.
+
+        Returns:
+            (index): Bit index of the point.
+
+        """
+        return i * self.size + j
+
+    def neighbors(self, mask):
+        """
+        Method to get all the points adjacent to a set of points.
+
+        Args:
+            mask(int): Set of points to get the neighbors of.
+
+        Returns:
+            (neighbors): Points adjacent to the set, excluding the set itself.
+
+        """
+        n = self.size
+        grown = (mask >> n) | (mask << n) | ((mask & self.not_first_column) >> 1) | \
+                ((mask & self.not_last_column) << 1)
+        return grown & self.full_mask & ~mask
+
+    def adjacent(self, mask):
+        """
+        Method to get all the points adjacent to at least one point of a set, including points of the set.
+
+        Args:
+            mask(int): Set of points to get the adjacent points of.
+
+        Returns:
+            (adjacent): Points with a neighbor in the set.
+
+        """
+        n = self.size
+        grown = (mask >> n) | (mask << n) | ((mask & self.not_first_column) >> 1) | \
+                ((mask & self.not_last_column) << 1)
+        return grown & self.full_mask
+
+    def flood_fill(self, seed, within):
+        """
+        Method to get all the points connected to a seed through a set of points.
+
+        Args:
+            seed(int): Points to start the fill from.
+            within(int): Points the fill is allowed to spread through.
+
+        Returns:
+            (group): Points of within connected to the seed.
+
+        """
+        group = seed & within
+        while True:
+            grown = group | (self.neighbors(group) & within)
+            if grown == group:
+                return group
+            group = grown
+
+    def liberties(self, group, empty):
+        """
+        Method to get the liberties of a group of stones.
+
+        Args:
+            group(int): Stones of the group.
+            empty(int): Empty points of the board.
+
+        Returns:
+            (liberties): Empty points adjacent to the group.
+
+        """
+        return self.neighbors(group) & empty
+
+    def zobrist_hash(self, black, white):
+        """
+        Method to get the Zobrist hash of a position.
+
+        Args:
+            black(int): Mask of the 'X' stones.
+            white(int): Mask of the 'O' stones.
+
+        Returns:
+            (hash): XOR of the Zobrist keys of all the stones.
+
+        """
+        value = 0
+        for piece_type, mask in ((1, black), (2, white)):
+            keys = self.zobrist_keys[piece_type]
+            for p in self.to_indexes(mask):
+                value ^= keys[p]
+        return value
+
+    def from_board(self, board):
+        """
+        Method to get the stone masks of a board.
+
+        Args:
+            board(list): Board to get the masks for.
+
+        Returns:
+            (black, white): Masks of the 'X' and 'O' stones.
+
+        """
+        black = 0
+        white = 0
+        bit = 1
+        for row in board:
+            for cell in row:
+                if cell == 1:
+                    black |= bit
+                elif cell == 2:
+                    white |= bit
+                bit <<= 1
+        return black, white
+
+    def to_board(self, black, white):
+        """
+        Method to get a board from stone masks.
+
+        Args:
+            black(int): Mask of the 'X' stones.
+            white(int): Mask of the 'O' stones.
+
+        Returns:
+            (board): Equivalent board.
+
+        """
+        n = self.size
+        board = [[0 for _ in range(n)] for _ in range(n)]
+        for i, j in self.to_points(black):
+            board[i][j] = 1
+        for i, j in self.to_points(white):
+            board[i][j] = 2
+        return board
+
+    def to_points(self, mask):
+        """
+        Method to get the points of a mask.
+
+        Args:
+            mask(int): Set of points.
+
+        Returns:
+            (points): List of (row, column) of the points in raster order.
+
+        """
+        n = self.size
+        points = []
+        while mask:
+            low = mask & -mask
+            p = low.bit_length() - 1
+            points.append((p // n, p % n))
+            mask ^= low
+        return points
+
+    def to_indexes(self, mask):
+        """
+        Method to get the bit indexes of a mask.
+
+        Args:
+            mask(int): Set of points.
+
+        Returns:
+            (indexes): List of the bit indexes of the points in raster order.
+
+        """
+        indexes = []
+        while mask:
+            low = mask & -mask
+            indexes.append(low.bit_length() - 1)
+            mask ^= low
+        return indexes
+
+
+_bitboards = {}
+
+
+def get_bitboard(n):
+    """
+    Method to get the shared bit masks for a board size.
+
+    Args:
+        n(int): Size of the board.
+
+    Returns:
+        (bitboard): BitBoard instance for the size.
+
+    """
+    bitboard = _bitboards.get(n)
+    if bitboard is None:
+        bitboard = _bitboards[n] = BitBoard(n)
+    return bitboard
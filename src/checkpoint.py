@@ -0,0 +1,258 @@
+import glob
+import os
+import queue
+import threading
+import time
+
+from q_table_store import FLAG_CANONICAL, dump_q_values, load_q_values, write_q_table
+
+
+def get_backup_path(path):
+    """
+    Method to get the path the previous full checkpoint is kept at while a new one replaces it.
+
+    Args:
+        path(str): Path of the Q table.
+
+    Returns:
+        (backup_path): Path of the previous full checkpoint.
+
+    """
+    return path + ".bak"
+
+
+def get_delta_path(path, sequence):
+    """
+    Method to get the path of a delta checkpoint of a Q table.
+
+    Args:
+        path(str): Path of the Q table.
+        sequence(int): Sequence number of the checkpoint.
+
+    Returns:
+        (delta_path): Path of the delta checkpoint.
+
+    """
+    return "{}.delta{}".format(path, sequence)
+
+
+def get_delta_paths(path):
+    """
+    Method to get the delta checkpoints of a Q table, in the order they were written.
+
+    Args:
+        path(str): Path of the Q table.
+
+    Returns:
+        (delta_paths): List of sequence number and path of the delta checkpoints.
+
+    """
+    delta_paths = []
+    for delta_path in glob.glob(glob.escape(path) + ".delta*"):
+        suffix = delta_path[len(path) + len(".delta"):]
+        if suffix.isdigit():
+            delta_paths.append((int(suffix), delta_path))
+    return sorted(delta_paths)
+
+
+def get_last_sequence(path):
+    """
+    Method to get the sequence number of the last delta checkpoint of a Q table. A table written outside of the
+    checkpoints stores it, so the deltas it already holds are not loaded over it.
+
+    Args:
+        path(str): Path of the Q table.
+
+    Returns:
+        (sequence): Sequence number of the last delta checkpoint, 0 if there is none.
+
+    """
+    delta_paths = get_delta_paths(path)
+    return delta_paths[-1][0] if delta_paths else 0
+
+
+def load_checkpoint(path):
+    """
+    Method to load a Q table with the delta checkpoints written since its last full checkpoint. If the Q table cannot be
+    read, the previous full checkpoint is used instead. A delta that cannot be read ends the loading, as every later
+    delta was written after it. Deltas with a sequence number up to the one stored in the loaded table were left by a
+    full checkpoint that stopped before removing them, the table already holds their Q values and they are skipped.
+
+    Args:
+        path(str): Path of the Q table.
+
+    Returns:
+        (q_values): Dictionary (or dictionary-like view) of encoded state -> Q values.
+
+    """
+    try:
+        if not os.path.exists(path) and os.path.exists(get_backup_path(path)):
+            # The process stopped after setting the previous checkpoint aside and before renaming the new one.
+            raise OSError("{} is missing".format(path))
+        q_values, table_sequence = load_q_values(path, with_sequence=True)
+    except (OSError, ValueError):
+        print("Could not read {}, falling back to the previous checkpoint.".format(path))
+        q_values, table_sequence = load_q_values(get_backup_path(path), with_sequence=True)
+
+    for sequence, delta_path in get_delta_paths(path):
+        if sequence <= table_sequence:
+            continue
+        try:
+            delta = load_q_values(delta_path)
+        except (OSError, ValueError):
+            print("Could not read {}, ignoring it and the later deltas.".format(delta_path))
+            break
+        if not isinstance(q_values, dict):
+            q_values = dict(q_values.items())
+        for state, values in delta.items():
+            q_values[state] = values
+    return q_values
+
+
+class Checkpointer():
+    """
+    Module that saves a Q table during training from a background thread. Most checkpoints are deltas holding only the
+    states changed since the previous checkpoint, and every full_interval-th checkpoint rewrites the whole table and
+    then removes the deltas. Every file is written to a temporary path and renamed, so a crash during a write leaves the
+    last good checkpoint in place. Each checkpoint takes the next sequence number, which names a delta and is stored in
+    a full table, so loading skips the deltas a table already holds.
+    """
+
+    def __init__(self, path, board_size=5, interval_games=1000, interval_seconds=None, full_interval=10):
+        """
+        Method to initialize the checkpointer and start its thread.
+
+        Args:
+            path(str): Path of the Q table, either JSON or a binary Q table. Deltas are binary Q tables next to it.
+            board_size(int): Size of the Go board. Defaults to 5.
+            interval_games(int): Number of games between checkpoints, None to not count games. Defaults to 1000.
+            interval_seconds(float): Number of seconds between checkpoints, None to not check the time. Defaults to
+                None.
+            full_interval(int): Number of checkpoints between full checkpoints. Defaults to 10.
+
+        """
+        self.path = path
+        self.board_size = board_size
+        self.interval_games = interval_games
+        self.interval_seconds = interval_seconds
+        self.full_interval = full_interval
+
+        self.num_games = 0
+        self.last_save_time = time.time()
+        self.num_deltas = len(get_delta_paths(path))
+        table_path = path if os.path.exists(path) else get_backup_path(path)
+        try:
+            table_sequence = load_q_values(table_path, with_sequence=True)[1]
+        except (OSError, ValueError):
+            table_sequence = 0
+        self.sequence = max(table_sequence, get_last_sequence(path)) # Sequence number of the last checkpoint queued
+        self.error = None
+
+        self.writes = queue.Queue()
+        self.thread = threading.Thread(target=self.write_checkpoints, daemon=True)
+        self.thread.start()
+
+    def record_game(self):
+        """
+        Method to count a finished game.
+
+        Returns:
+            (due): Whether a checkpoint is due.
+
+        """
+        self.num_games += 1
+        if self.interval_games is not None and self.num_games >= self.interval_games:
+            return True
+        return self.interval_seconds is not None and time.time() - self.last_save_time >= self.interval_seconds
+
+    def full_due(self):
+        """
+        Method to check whether the next checkpoint rewrites the whole table.
+
+        Returns:
+            (due): Whether a full checkpoint is due.
+
+        """
+        return self.num_deltas + 1 >= self.full_interval or not os.path.exists(self.path)
+
+    def save(self, q_values, changed_q_values, full=False):
+        """
+        Method to queue a checkpoint. The Q values to write are copied here, so training can go on updating them while
+        the thread writes. The changed Q values are cleared.
+
+        Args:
+            q_values(dict): Dictionary (or dictionary-like view) of encoded state -> Q values of the whole table, only
+                read if the checkpoint is full.
+            changed_q_values(dict): Encoded state -> Q values of the states changed since the previous checkpoint.
+            full(bool): Whether to write the whole table instead of a delta. Defaults to False.
+
+        """
+        full = full or self.full_due()
+        if full:
+            snapshot = {state: [list(row) for row in values] for state, values in q_values.items()}
+            self.num_deltas = 0
+        else:
+            snapshot = {state: [list(row) for row in values] for state, values in changed_q_values.items()}
+            self.num_deltas += 1
+        changed_q_values.clear()
+
+        self.sequence += 1
+        self.writes.put((snapshot, full, self.sequence))
+        self.num_games = 0
+        self.last_save_time = time.time()
+
+    def write_checkpoints(self):
+        """
+        Method run by the thread to write the queued checkpoints.
+        """
+        while True:
+            write = self.writes.get()
+            try:
+                if write is not None:
+                    self.write_checkpoint(*write)
+            except OSError as error:
+                self.error = error
+                print("Checkpoint of {} failed: {}".format(self.path, error))
+            finally:
+                self.writes.task_done()
+            if write is None:
+                return
+
+    def write_checkpoint(self, snapshot, full, sequence):
+        """
+        Method to write a checkpoint.
+
+        Args:
+            snapshot(dict): Encoded state -> Q values to write.
+            full(bool): Whether the snapshot is the whole table.
+            sequence(int): Sequence number of the checkpoint, used in the file name of a delta and stored in a table.
+
+        """
+        if not full:
+            write_q_table(get_delta_path(self.path, sequence), snapshot, self.board_size, flags=FLAG_CANONICAL)
+            return
+
+        # The temporary path keeps the extension of the table, which picks the format of the file.
+        root, extension = os.path.splitext(self.path)
+        temp_path = root + ".full" + extension
+        dump_q_values(temp_path, snapshot, self.board_size, FLAG_CANONICAL, sequence)
+        # The deltas are only removed once the new table is in place, so a crash in between never loses the Q values
+        # changed since the previous full checkpoint. Deltas left behind have lower sequence numbers and are skipped.
+        if os.path.exists(self.path):
+            os.replace(self.path, get_backup_path(self.path))
+        os.replace(temp_path, self.path)
+        for _, delta_path in get_delta_paths(self.path):
+            os.remove(delta_path)
+
+    def wait(self):
+        """
+        Method to wait until every queued checkpoint is written.
+        """
+        self.writes.join()
+
+    def close(self):
+        """
+        Method to write the queued checkpoints and stop the thread.
+        """
+        self.writes.put(None)
+        self.thread.join()
@@ -0,0 +1,285 @@
+import random
+import time
+
+from alpha_beta_player import SearchTimeout
+from bitboard import popcount
+from opening_book import OpeningBook, write_opening_book
+from symmetry import get_symmetries
+
+from go_board import GO
+
+
+TABLEBASE_PATH = "endgame_tablebase.bin"
+ENDGAME_PLIES = 10 # Max number of plies left in the game for the solver to be tried
+ENDGAME_EMPTY_POINTS = 14 # Max number of empty points for the solver to be tried
+MAX_TABLE_SIZE = 2000000 # Number of solved positions kept in memory before the table is cleared
+
+
+class EndgameSolver():
+    """
+    Exact solver of the end of a game. The game ends when max_move moves were played or after two passes in a row, and
+    the winner is known from the stone counts and the komi (which rules out ties on an odd board size), so every
+    position is a win or a loss for the side to move. A position is a win if one of its actions (the placements and
+    PASS) leads to a loss for the opponent. The search stops at the first such action, tries first the actions leaving
+    the opponent the fewest replies (the action with the smallest proof number after a one step expansion), and keeps
+    every solved position in a table.
+    """
+
+    def __init__(self, board_size=5, tablebase_path=TABLEBASE_PATH):
+        """
+        Method to initialize the solver.
+
+        Args:
+            board_size(int): Size of the Go board. Defaults to 5.
+            tablebase_path(str): Path of the precomputed tablebase, None for no tablebase. A missing file gives an
+                empty tablebase. Defaults to TABLEBASE_PATH.
+
+        """
+        self.board_size = board_size
+        self.symmetries = get_symmetries(board_size)
+        self.tablebase = OpeningBook(tablebase_path)
+        self.table = {} # (search key, plies left, passed) -> (win, point)
+        self.records = None # Tablebase key -> stored byte of the positions solved, when building a tablebase
+        self.deadline = None
+        self.nodes = 0
+
+    def can_solve(self, go, plies_left):
+        """
+        Method to check whether a position is under the thresholds of the solver.
+
+        Args:
+            go(GO): Instance of the Go board.
+            plies_left(int): Number of moves left in the game, including the one to play.
+
+        Returns:
+            (solvable): Whether the solver should be tried.
+
+        """
+        return plies_left <= ENDGAME_PLIES and popcount(go.empty_mask) <= ENDGAME_EMPTY_POINTS
+
+    def get_tablebase_key(self, go, piece_type, plies_left, passed):
+        """
+        Method to get the key of a position in the tablebase, from its canonical state. The point a KO rule forbids is
+        moved to the canonical board with the state.
+
+        Args:
+            go(GO): Instance of the Go board.
+            piece_type(int): Type of piece to move. 1('X') or 2('O').
+            plies_left(int): Number of moves left in the game.
+            passed(bool): Whether the last move was a PASS.
+
+        Returns:
+            (key): Nonzero integer key.
+
+        """
+        num_points = self.board_size * self.board_size
+        canonical_state, t = self.symmetries.canonicalize(go.encoded_state)
+        ko_point = num_points
+        if len(go.died_pieces) == 1:
+            ko_point = self.symmetries.forward[t][go.died_pieces[0][0] * self.board_size + go.died_pieces[0][1]]
+        key = (int(canonical_state, 3) * (num_points + 1) + ko_point) * 2 + passed
+        return ((key * (go.max_move + 1) + plies_left) * 2 + piece_type - 1) + 1
+
+    def get_action(self, go, piece_type, plies_left, passed=False, time_limit=None):
+        """
+        Method to solve a position and get its best action.
+
+        Args:
+            go(GO): Instance of the Go board.
+            piece_type(int): Type of piece the player agent is playing as. 1('X') or 2('O').
+            plies_left(int): Number of moves left in the game, including the one to play.
+            passed(bool): Whether the opponent passed on the last move, so a PASS ends the game. Defaults to False.
+            time_limit(float): Seconds the solver may take. Defaults to None (no limit).
+
+        Returns:
+            (action, win): (row, column) or "PASS", and whether the action wins against any reply. None if the time ran
+                out first.
+
+        """
+        num_points = self.board_size * self.board_size
+        self.nodes = 0
+        value = self.tablebase.get(self.get_tablebase_key(go, piece_type, plies_left, passed))
+        if value is not None:
+            canonical_point, win = divmod(value, 2)
+            if canonical_point == num_points:
+                return "PASS", bool(win)
+            _, t = self.symmetries.canonicalize(go.encoded_state)
+            return divmod(self.symmetries.backward[t][canonical_point], self.board_size), bool(win)
+
+        if len(self.table) > MAX_TABLE_SIZE:
+            self.table = {}
+        self.deadline = None if time_limit is None else time.time() + time_limit
+        undo_depth = len(go.undo_stack)
+        try:
+            win, point = self.solve(go, piece_type, plies_left, passed)
+        except SearchTimeout:
+            while len(go.undo_stack) > undo_depth:
+                go.unmake_move()
+            return None
+        finally:
+            self.deadline = None
+        return ("PASS" if point == num_points else divmod(point, self.board_size)), win
+
+    def solve(self, go, piece_type, plies_left, passed):
+        """
+        Method to solve a position.
+
+        Args:
+            go(GO): Instance of the Go board.
+            piece_type(int): Type of piece to move. 1('X') or 2('O').
+            plies_left(int): Number of moves left in the game, at least 1.
+            passed(bool): Whether the last move was a PASS.
+
+        Returns:
+            (win, point): Whether the side to move wins, and the point of its best action, board_size * board_size for
+                a PASS.
+
+        """
+        self.nodes += 1
+        if self.deadline is not None and time.time() > self.deadline:
+            raise SearchTimeout()
+
+        key = (go.search_key(piece_type), plies_left, passed)
+        result = self.table.get(key)
+        if result is not None:
+            return result
+
+        num_points = self.board_size * self.board_size
+        opponent = 3 - piece_type
+        points = go.bitboard.to_indexes(go.legal_mask(piece_type))
+        result = None
+
+        if plies_left == 1:
+            # The game ends after this move, the side to move wins if any action leaves it ahead.
+            if go.judge_winner() == piece_type:
+                result = (True, num_points)
+            for p in points:
+                if result is not None:
+                    break
+                go.make_move(p // self.board_size, p % self.board_size, piece_type)
+                if go.judge_winner() == piece_type:
+                    result = (True, p)
+                go.unmake_move()
+        else:
+            # A PASS that ends the game is tried first, as it needs no search.
+            if passed and go.judge_winner() == piece_type:
+                result = (True, num_points)
+            else:
+                children = []
+                for p in points:
+                    go.make_move(p // self.board_size, p % self.board_size, piece_type)
+                    known = self.table.get((go.search_key(opponent), plies_left - 1, False))
+                    if known is not None and not known[0]:
+                        # A reply already known to lose for the opponent.
+                        result = (True, p)
+                    elif known is None and plies_left > 3:
+                        children.append((popcount(go.legal_mask(opponent)), p))
+                    elif known is None:
+                        children.append((0, p))
+                    go.unmake_move()
+                    if result is not None:
+                        break
+
+                if result is None:
+                    children.sort()
+                    for _, p in children:
+                        go.make_move(p // self.board_size, p % self.board_size, piece_type)
+                        opponent_win, _ = self.solve(go, opponent, plies_left - 1, False)
+                        go.unmake_move()
+                        if not opponent_win:
+                            result = (True, p)
+                            break
+
+                if result is None and not passed:
+                    # A PASS clears the KO and lets the opponent end the game with another PASS.
+                    died_pieces, previous_hash = go.died_pieces, go.previous_hash
+                    go.died_pieces, go.previous_hash = [], go.zobrist_hash
+                    try:
+                        opponent_win, _ = self.solve(go, opponent, plies_left - 1, True)
+                    finally:
+                        go.died_pieces, go.previous_hash = died_pieces, previous_hash
+                    if not opponent_win:
+                        result = (True, num_points)
+
+        if result is None:
+            result = (False, points[0] if points else num_points)
+        self.table[key] = result
+        if self.records is not None:
+            self.records[self.get_tablebase_key(go, piece_type, plies_left, passed)] = self.get_record(go, result)
+        return result
+
+    def get_record(self, go, result):
+        """
+        Method to get the byte stored in the tablebase for a solved position.
+
+        Args:
+            go(GO): Instance of the Go board.
+            result(tuple): (win, point) of the position.
+
+        Returns:
+            (value): Point of the action on the canonical board times 2, plus 1 for a win.
+
+        """
+        win, point = result
+        if point != self.board_size * self.board_size:
+            _, t = self.symmetries.canonicalize(go.encoded_state)
+            point = self.symmetries.forward[t][point]
+        return point * 2 + win
+
+
+def get_endgame_positions(num_positions, plies_left, board_size=5, seed=0):
+    """
+    Method to get positions with a number of plies left by playing random valid placements from the empty board.
+
+    Args:
+        num_positions(int): Number of positions.
+        plies_left(int): Number of moves left in the game at the positions.
+        board_size(int): Size of the Go board. Defaults to 5.
+        seed(int): Seed of the random moves. Defaults to 0.
+
+    Returns:
+        (positions): List of (go, piece_type) with the piece type to move.
+
+    """
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < num_positions:
+        go = GO(board_size)
+        go.init_board(board_size)
+        piece_type = 1
+        for _ in range(go.max_move - plies_left):
+            moves = go.legal_moves(piece_type)
+            if not moves:
+                break
+            move = rng.choice(moves)
+            go.make_move(move[0], move[1], piece_type)
+            piece_type = 3 - piece_type
+        else:
+            go.undo_stack = []
+            positions.append((go, piece_type))
+    return positions
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Solve endgame positions and write them to a tablebase.")
+    parser.add_argument("--positions", "-p", type=int, help="number of positions per number of plies left",
+                        default=200)
+    parser.add_argument("--plies", "-k", type=int, help="max number of plies left", default=ENDGAME_PLIES)
+    parser.add_argument("--output", "-o", help="path of the tablebase", default=TABLEBASE_PATH)
+    args = parser.parse_args()
+
+    solver = EndgameSolver(tablebase_path=None)
+    solver.records = {}
+    for plies_left in range(1, args.plies + 1):
+        start = time.time()
+        nodes = 0
+        for go, piece_type in get_endgame_positions(args.positions, plies_left, seed=plies_left):
+            solver.get_action(go, piece_type, plies_left)
+            nodes += solver.nodes
+        print("Plies left: {}. Nodes: {}. Time: {:.2f}s. Tablebase size: {}".format(
+            plies_left, nodes, time.time() - start, len(solver.records)))
+
+    write_opening_book(args.output, solver.records, plies=args.plies)
+    print("Wrote {} positions to {}.".format(len(solver.records), args.output))
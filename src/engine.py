@@ -0,0 +1,196 @@
+import os
+import time
+
+from alpha_beta_player import AlphaBetaPlayer
+from endgame_solver import EndgameSolver, TABLEBASE_PATH
+from opening_book import OpeningBook, OPENING_BOOK_PATH
+
+from go_board import GO
+
+
+ENDGAME_TIME_FRACTION = 0.5 # Share of the time limit the endgame solver may take before the search takes over
+
+
+class Engine():
+    """
+    Players of the match kept between moves, so the Q table, the transposition table and the move ordering statistics
+    stay loaded. Used by the engine daemon, and by my_player3.py for a single move when the daemon is not running. With
+    pondering on, the position after every move is searched until the next request arrives.
+    """
+
+    def __init__(self, board_size=5, ponder=False, opening_book_path=OPENING_BOOK_PATH,
+                 tablebase_path=TABLEBASE_PATH):
+        """
+        Method to initialize the engine. The players are created on their first move.
+
+        Args:
+            board_size(int): Size of the Go board. Defaults to 5.
+            ponder(bool): Whether to search on the opponent's time. Defaults to False.
+            opening_book_path(str): Path of the opening book, played before any search. Defaults to
+                OPENING_BOOK_PATH.
+            tablebase_path(str): Path of the endgame tablebase. Defaults to TABLEBASE_PATH.
+
+        """
+        self.board_size = board_size
+        try:
+            self.opening_book = OpeningBook(opening_book_path)
+        except (OSError, ValueError) as error:
+            print("Could not read the opening book: {}".format(error))
+            self.opening_book = OpeningBook(None)
+        try:
+            self.endgame_solver = EndgameSolver(board_size, tablebase_path)
+        except (OSError, ValueError) as error:
+            print("Could not read the endgame tablebase: {}".format(error))
+            self.endgame_solver = EndgameSolver(board_size, None)
+        self.ponder = ponder
+        self.alpha_beta_player = None
+        self.q_players = {} # Piece type -> QPlayer
+        self.next_ponder = None # (go, piece type, depth) of the position to ponder once the action is sent
+        self.pondered = None # GO instance being pondered
+
+    def get_action(self, piece_type, previous_board, board, turn, player_type="ALPHA_BETA", time_limit=None):
+        """
+        Method to get the action of a move.
+
+        Args:
+            piece_type(int): Type of piece the player agent is playing as. 1('X') or 2('O').
+            previous_board(list): Board before the last move of the opponent.
+            board(list): Current board.
+            turn(int): Number of the move in the game, starting at 1.
+            player_type(str): "ALPHA_BETA" or "Q". Defaults to "ALPHA_BETA".
+            time_limit(float): Seconds of search. Defaults to None (no limit).
+
+        Returns:
+            (action, stats): Co-ordinates of the board to place the agent's piece at, or "PASS", and a dictionary of
+                search statistics.
+
+        """
+        N = self.board_size
+        ponder_stats = self.stop_pondering(board)
+
+        go = GO(N)
+        go.set_board(piece_type, previous_board, board)
+
+        # Iterative deepening goes as deep as the time limit allows, up to the number of remaining moves.
+        depth = go.max_move - turn + 1
+        stats = {"max_depth": depth}
+        if ponder_stats is not None:
+            stats["ponder"] = ponder_stats
+
+        start = time.time()
+        action = None
+        if turn <= self.opening_book.plies:
+            # The book only has the positions with fewer moves played than the plies it covers.
+            action = self.opening_book.get_action(go, piece_type)
+        if action is not None:
+            stats["book"] = True
+        elif board[int(N / 2)][int(N / 2)] == 0 and turn <= 2:
+            action = (int(N / 2), int(N / 2))
+        elif self.endgame_solver.can_solve(go, depth):
+            # The previous board only equals the board when the opponent passed.
+            action = self.get_endgame_action(go, piece_type, depth, turn > 1 and previous_board == board, time_limit,
+                                             stats)
+
+        if action is None and player_type == "Q":
+            player = self.q_players.get(piece_type)
+            if player is None:
+                # Imported here, as NumPy and the Q table code are only needed by the Q player.
+                from q_player import QPlayer, Q_TABLE_PATH, Q_TABLE_BINARY_PATH
+
+                q_table_path = Q_TABLE_BINARY_PATH if os.path.exists(Q_TABLE_BINARY_PATH) else Q_TABLE_PATH
+                player = self.q_players[piece_type] = QPlayer(piece_type, q_table_path)
+            if turn <= 2:
+                # A new game, the states of the previous one are not learned from here.
+                player.state_history = []
+                player.canonical_states = {}
+            action = player.get_agent_action(go, piece_type)
+        elif action is None:
+            if time_limit is not None:
+                time_limit = max(0.0, time_limit - (time.time() - start))
+            player = self.get_alpha_beta_player()
+            action = player.get_agent_action(go, piece_type, depth, time_limit)
+            stats["depth"] = player.completed_depth
+            stats["nodes"] = player.nodes
+            stats["transposition_table"] = player.transposition_table.stats()
+
+        # Only the alpha-beta player searches, so there is nothing to ponder for the Q player.
+        if self.ponder and player_type == "ALPHA_BETA" and action != "PASS" and depth > 2:
+            go.make_move(action[0], action[1], piece_type)
+            self.next_ponder = (go, piece_type, depth - 1)
+        return action, stats
+
+    def get_endgame_action(self, go, piece_type, plies_left, passed, time_limit, stats):
+        """
+        Method to get a winning action from the endgame solver.
+
+        Args:
+            go(GO): Instance of the Go board.
+            piece_type(int): Type of piece the player agent is playing as. 1('X') or 2('O').
+            plies_left(int): Number of moves left in the game, including the one to play.
+            passed(bool): Whether the opponent passed on the last move.
+            time_limit(float): Seconds of the move, the solver takes at most ENDGAME_TIME_FRACTION of them.
+            stats(dict): Search statistics, updated with the result of the solver.
+
+        Returns:
+            (action): Action that wins against any reply. None if the solver ran out of time or the position is lost,
+                in which case the search picks the action.
+
+        """
+        solver_time_limit = None if time_limit is None else time_limit * ENDGAME_TIME_FRACTION
+        result = self.endgame_solver.get_action(go, piece_type, plies_left, passed, solver_time_limit)
+        stats["endgame_nodes"] = self.endgame_solver.nodes
+        if result is None:
+            return None
+        action, win = result
+        stats["solved"] = "win" if win else "loss"
+        return action if win else None
+
+    def get_alpha_beta_player(self):
+        """
+        Method to get the alpha-beta player, created on its first use.
+
+        Returns:
+            (player): The AlphaBetaPlayer of the engine.
+
+        """
+        if self.alpha_beta_player is None:
+            self.alpha_beta_player = AlphaBetaPlayer()
+        return self.alpha_beta_player
+
+    def start_pondering(self):
+        """
+        Method to start searching the position after the last action, once it is sent. The transposition table
+        entries of the search are reused by the next move.
+        """
+        if self.next_ponder is None:
+            return
+        go, piece_type, depth = self.next_ponder
+        self.next_ponder = None
+        self.get_alpha_beta_player().start_pondering(go, piece_type, depth)
+        self.pondered = go
+
+    def stop_pondering(self, board=None):
+        """
+        Method to stop pondering, and check whether the opponent played the predicted reply (a ponder hit), in which
+        case the next search starts from a position the pondering already searched.
+
+        Args:
+            board(list): Board after the move of the opponent, None to not check it. Defaults to None.
+
+        Returns:
+            (stats): Dictionary with the predicted reply, whether it was played, and the depth and nodes of the
+                pondering. None if the engine was not pondering.
+
+        """
+        self.next_ponder = None
+        if self.pondered is None:
+            return None
+        go = self.pondered
+        self.pondered = None
+        player = self.alpha_beta_player
+        player.stop_pondering()
+
+        # The thread leaves the board at the predicted reply, unless it was interrupted before playing it.
+        predicted = player.ponder_action
+        return {"predicted": predicted, "hit": predicted is not None and go.board == board,
+                "depth": player.completed_depth, "nodes": player.nodes}
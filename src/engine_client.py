@@ -0,0 +1,58 @@
+import os
+
+
+SOCKET_PATH = "/tmp/minigo_engine.sock" # Unix socket the engine daemon listens on
+CONNECT_TIMEOUT = 0.2 # Seconds to wait for the daemon to accept the connection
+COMMAND_TIMEOUT = 1.0 # Seconds to wait for the answer to a request without a time limit key, like a stop command
+FALLBACK_RESERVE = 1.0 # Seconds of the time limit kept from the daemon, so the move can still be searched locally
+
+
+def request_action(request, socket_path=SOCKET_PATH):
+    """
+    Method to ask the engine daemon for the action of a move. Only the standard library is imported here, so a move
+    played by the daemon does not pay for loading the engine, and json and socket are only imported once the socket
+    of the daemon is found. The daemon searches for the time limit minus a reserve, and the client waits for it until
+    half of the reserve is left, which the caller can use to search locally if the daemon does not answer.
+
+    Args:
+        request(dict): Request holding the piece type, the previous board, the board, the turn, the player type and the
+            time limit of the move (None for no limit), as read by EngineServer.
+        socket_path(str): Path of the Unix socket of the daemon. Defaults to SOCKET_PATH.
+
+    Returns:
+        (response): Dictionary with the action and the search statistics, None if the daemon is not running or did not
+            answer in time.
+
+    """
+    if not os.path.exists(socket_path):
+        return None
+
+    import json
+    import socket
+
+    if "time_limit" not in request:
+        response_timeout = COMMAND_TIMEOUT
+    elif request["time_limit"] is None:
+        response_timeout = None
+    else:
+        reserve = min(FALLBACK_RESERVE, request["time_limit"] / 4)
+        response_timeout = request["time_limit"] - reserve / 2
+        request = dict(request, time_limit=request["time_limit"] - reserve)
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(CONNECT_TIMEOUT)
+            client.connect(socket_path)
+            client.settimeout(response_timeout)
+            client.sendall(json.dumps(request).encode() + b"\n")
+            with client.makefile("rb") as stream:
+                response = json.loads(stream.readline())
+    except (OSError, ValueError):
+        return None
+
+    if "error" in response:
+        print("Engine daemon failed: {}".format(response["error"]))
+        return None
+    if response.get("action", "PASS") != "PASS":
+        response["action"] = tuple(response["action"])
+    return response
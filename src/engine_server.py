@@ -0,0 +1,99 @@
+import argparse
+import json
+import os
+import socket
+import socketserver
+import time
+
+from engine import Engine
+from engine_client import SOCKET_PATH, request_action
+
+
+class EngineRequestHandler(socketserver.StreamRequestHandler):
+    """
+    Handler of one connection to the engine daemon. The request and the response are single lines of JSON.
+    """
+
+    def handle(self):
+        """
+        Method to answer a request with the action of the move, or to stop the daemon on a "stop" command.
+        """
+        start = time.time()
+        try:
+            request = json.loads(self.rfile.readline())
+            if request.get("command") == "stop":
+                self.server.engine.stop_pondering()
+                response = {"stopped": True}
+                self.server.stopping = True
+            else:
+                # The client sends what is left of the time limit of the move.
+                time_limit = request.get("time_limit")
+                action, stats = self.server.engine.get_action(
+                    request["piece_type"], request["previous_board"], request["board"], request["turn"],
+                    request.get("player_type", "ALPHA_BETA"), time_limit)
+                stats["time"] = time.time() - start
+                response = {"action": action, "stats": stats}
+        except (ValueError, KeyError, TypeError) as error:
+            response = {"error": repr(error)}
+        self.wfile.write(json.dumps(response).encode() + b"\n")
+        self.wfile.flush()
+        self.server.engine.start_pondering()
+
+
+class EngineServer(socketserver.UnixStreamServer):
+    """
+    Long lived engine daemon listening on a Unix socket. Requests are answered one at a time, as they share the
+    players of the engine.
+    """
+
+    def __init__(self, socket_path=SOCKET_PATH, board_size=5, ponder=False):
+        """
+        Method to bind the socket of the daemon. A socket file left by a daemon that is no longer running is removed.
+
+        Args:
+            socket_path(str): Path of the Unix socket. Defaults to SOCKET_PATH.
+            board_size(int): Size of the Go board. Defaults to 5.
+            ponder(bool): Whether to search on the opponent's time. Defaults to False.
+
+        """
+        if os.path.exists(socket_path):
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                try:
+                    probe.connect(socket_path)
+                except OSError:
+                    os.remove(socket_path)
+                else:
+                    raise OSError("An engine daemon is already listening on {}".format(socket_path))
+
+        self.socket_path = socket_path
+        self.engine = Engine(board_size, ponder)
+        self.stopping = False
+        super().__init__(socket_path, EngineRequestHandler)
+
+    def serve(self):
+        """
+        Method to answer requests until a "stop" command, and remove the socket file.
+        """
+        try:
+            while not self.stopping:
+                self.handle_request()
+        finally:
+            self.engine.stop_pondering()
+            self.server_close()
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the engine daemon that plays the moves of my_player3.py.")
+    parser.add_argument("--socket", "-s", help="path of the Unix socket", default=SOCKET_PATH)
+    parser.add_argument("--ponder", "-p", action="store_true", help="search on the opponent's time")
+    parser.add_argument("--stop", action="store_true", help="stop the daemon listening on the socket")
+    args = parser.parse_args()
+
+    if args.stop:
+        print("Stopped." if request_action({"command": "stop"}, args.socket) else "No engine daemon is running.")
+    else:
+        server = EngineServer(args.socket, ponder=args.ponder)
+        print("Engine daemon listening on {}".format(args.socket))
+        server.serve()
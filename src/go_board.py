@@ -0,0 +1,875 @@
+from copy import deepcopy
+
+from bitboard import get_bitboard, popcount
+
+
+class GO:
+    def __init__(self, n):
+        """
+        Go game.
+
+        :param n: size of the board n*n
+        """
+        self.size = n
+        self.bitboard = get_bitboard(n) # Bit masks shared by all boards of this size
+        self.stones = [0, 0, 0] # Mask of the stones of each piece type, kept in sync with the board
+        self.previous_key = None # Position key of the previous board
+        self.previous_hash = None # Zobrist hash of the previous board
+        self.position_history = [] # Zobrist hashes of the positions before each move, used for superko
+        self.superko = False # Whether a move may not repeat any earlier position of the game
+        self._zobrist_hash = 0
+        self.group_ids = [0] * (n * n) # Group id of the stone at each point, 0 for empty points
+        self.groups = {} # Group id -> (piece type, stone mask, liberty mask)
+        self.next_group_id = 1
+        self._board = None
+        self._previous_board = None
+        self.X_move = True # X chess plays first
+        self.died_pieces = [] # Intialize died pieces to be empty
+        self.n_move = 0 # Trace the number of moves
+        self.max_move = n * n - 1 # The max movement of a Go game
+        self.komi = n/2 # Komi rule
+        self.verbose = False # Verbose only when there is a manual player
+        self.undo_stack = [] # Records of the moves made with make_move
+
+    def init_board(self, n):
+        '''
+        Initialize a board with size n*n.
+
+        :param n: width and height of the board.
+        :return: None.
+        '''
+        board = [[0 for x in range(n)] for y in range(n)]  # Empty space marked as 0
+        # 'X' pieces marked as 1
+        # 'O' pieces marked as 2
+        self.board = board
+        self.previous_board = deepcopy(board)
+        self.position_history = []
+
+    @property
+    def board(self):
+        """
+        Current board state. Assigning a new board resynchronizes the stone masks with it, so the board should not be
+        modified in place outside of the GO methods.
+        """
+        return self._board
+
+    @board.setter
+    def board(self, board):
+        self._board = board
+        if board is None:
+            self.stones = [0, 0, 0]
+        else:
+            black, white = self.bitboard.from_board(board)
+            self.stones = [0, black, white]
+        self._zobrist_hash = self.bitboard.zobrist_hash(self.stones[1], self.stones[2])
+        self.build_groups()
+
+    @property
+    def previous_board(self):
+        """
+        Previous board state. It is only kept as a position key while playing and is rebuilt from it when read.
+        """
+        if self._previous_board is None and self.previous_key is not None:
+            num_points = self.bitboard.num_points
+            self._previous_board = self.bitboard.to_board(self.previous_key & self.bitboard.full_mask,
+                                                          self.previous_key >> num_points)
+        return self._previous_board
+
+    @previous_board.setter
+    def previous_board(self, previous_board):
+        self._previous_board = previous_board
+        if previous_board is None:
+            self.previous_key = None
+            self.previous_hash = None
+        else:
+            black, white = self.bitboard.from_board(previous_board)
+            self.previous_key = black | (white << self.bitboard.num_points)
+            self.previous_hash = self.bitboard.zobrist_hash(black, white)
+
+    @property
+    def position_key(self):
+        """
+        Position key of the current board. Two boards are equal if and only if their keys are equal.
+        """
+        return self.stones[1] | (self.stones[2] << self.bitboard.num_points)
+
+    @property
+    def empty_mask(self):
+        """
+        Mask of the empty points of the current board.
+        """
+        return self.bitboard.full_mask & ~(self.stones[1] | self.stones[2])
+
+    @property
+    def zobrist_hash(self):
+        """
+        Zobrist hash of the current board, kept up to date incrementally as stones are placed and removed.
+        """
+        return self._zobrist_hash
+
+    def search_key(self, piece_type):
+        """
+        Method to get a key of the position for search caches. Unlike the Zobrist hash it also depends on the side to
+        move and on the point a KO rule currently forbids.
+
+        Args:
+            piece_type(int): Piece type to move. 1('X') or 2('O').
+
+        Returns:
+            (key): Search key of the position.
+
+        """
+        key = self._zobrist_hash ^ self.bitboard.zobrist_side_keys[piece_type]
+        # Only a single captured stone can be retaken to repeat the previous board
+        if len(self.died_pieces) == 1:
+            key ^= self.bitboard.zobrist_ko_keys[self.died_pieces[0][0] * self.size + self.died_pieces[0][1]]
+        return key
+
+    @property
+    def encoded_state(self):
+        """
+        Method to get the encoded state of the board.
+        """
+        return "".join([str(cell) for row in self._board for cell in row])
+
+    def set_board(self, piece_type, previous_board, board):
+        '''
+        Initialize board status.
+        :param previous_board: previous board state.
+        :param board: current board state.
+        :return: None.
+        '''
+
+        # 'X' pieces marked as 1
+        # 'O' pieces marked as 2
+
+        # self.piece_type = piece_type
+        self.previous_board = previous_board
+        self.board = board
+
+        previous_stones = self.previous_key & self.bitboard.full_mask if piece_type == 1 else \
+                          self.previous_key >> self.bitboard.num_points
+        self.died_pieces.extend(self.bitboard.to_points(previous_stones & ~self.stones[piece_type]))
+
+    def set_from_state(self, state):
+        """
+        Method to set the Go board from an encoded state.
+
+        Args:
+            state(str): Encoded state to set the Go board from.
+
+        """
+        board = [[int(state[i * self.size + j]) for j in range(self.size)] for i in range(self.size)]
+
+        init_previous_board = True
+        if self.board:
+            self.previous_board = deepcopy(self.board)
+            init_previous_board = False
+
+        self.board = board
+
+        if init_previous_board:
+            self.previous_board = deepcopy(self.board)
+
+    def build_groups(self):
+        """
+        Method to rebuild the group table from the stone masks. The table is then kept up to date incrementally by
+        add_stone and remove_certain_pieces.
+        """
+        bitboard = self.bitboard
+        empty = self.empty_mask
+        self.group_ids = [0] * bitboard.num_points
+        self.groups = {}
+        self.next_group_id = 1
+
+        for piece_type in (1, 2):
+            remaining = self.stones[piece_type]
+            while remaining:
+                group = bitboard.flood_fill(remaining & -remaining, remaining)
+                self.new_group(piece_type, group, bitboard.liberties(group, empty))
+                remaining &= ~group
+
+    def new_group(self, piece_type, stones, liberties):
+        """
+        Method to add a group to the group table.
+
+        Args:
+            piece_type(int): Piece type of the group. 1('X') or 2('O').
+            stones(int): Mask of the stones of the group.
+            liberties(int): Mask of the liberties of the group.
+
+        Returns:
+            (group_id): Id of the new group.
+
+        """
+        group_id = self.next_group_id
+        self.next_group_id += 1
+        self.groups[group_id] = (piece_type, stones, liberties)
+        for p in self.bitboard.to_indexes(stones):
+            self.group_ids[p] = group_id
+        return group_id
+
+    def add_stone(self, i, j, piece_type):
+        """
+        Method to put a stone on an empty point without any rule checks, updating the group table. The stone joins the
+        adjacent friendly groups and is taken off the liberties of the adjacent enemy groups.
+
+        Args:
+            i(int): Row number of the board.
+            j(int): Column number of the board.
+            piece_type(int): 1('X') or 2('O').
+
+        """
+        bitboard = self.bitboard
+        groups = self.groups
+        group_ids = self.group_ids
+        p = i * self.size + j
+        bit = bitboard.point_masks[p]
+
+        liberties = bitboard.neighbor_masks[p] & self.empty_mask
+        self._board[i][j] = piece_type
+        self.stones[piece_type] |= bit
+        self._zobrist_hash ^= bitboard.zobrist_keys[piece_type][p]
+
+        allies = set()
+        for q in bitboard.neighbor_indexes[p]:
+            group_id = group_ids[q]
+            if group_id:
+                group_type, group_stones, group_liberties = groups[group_id]
+                if group_type == piece_type:
+                    allies.add(group_id)
+                else:
+                    groups[group_id] = (group_type, group_stones, group_liberties & ~bit)
+
+        if not allies:
+            group_ids[p] = self.next_group_id
+            groups[self.next_group_id] = (piece_type, bit, liberties)
+            self.next_group_id += 1
+            return
+
+        # Union by size: the largest adjacent group absorbs the stone and the other adjacent groups
+        group_id = max(allies, key=lambda ally: popcount(groups[ally][1]))
+        _, stones, group_liberties = groups[group_id]
+        stones |= bit
+        liberties |= group_liberties
+        for ally in allies:
+            if ally != group_id:
+                _, ally_stones, ally_liberties = groups.pop(ally)
+                stones |= ally_stones
+                liberties |= ally_liberties
+                for q in bitboard.to_indexes(ally_stones):
+                    group_ids[q] = group_id
+        group_ids[p] = group_id
+        groups[group_id] = (piece_type, stones, liberties & ~bit)
+
+    def compare_board(self, board1, board2):
+        for i in range(self.size):
+            for j in range(self.size):
+                if board1[i][j] != board2[i][j]:
+                    return False
+        return True
+
+    def copy_board(self):
+        '''
+        Copy the current board for potential testing.
+
+        :param: None.
+        :return: the copied board instance.
+        '''
+        return deepcopy(self)
+
+    def detect_neighbor(self, i, j):
+        '''
+        Detect all the neighbors of a given stone.
+
+        :param i: row number of the board.
+        :param j: column number of the board.
+        :return: a list containing the neighbors row and column (row, column) of position (i, j).
+        '''
+        # Neighbor coordinates are precomputed for every point, borders included
+        return self.bitboard.neighbor_points[i * self.size + j]
+
+    def group_mask(self, i, j):
+        """
+        Method to get the mask of the group of connected points of the same kind as a given point.
+
+        Args:
+            i(int): Row number of the board.
+            j(int): Column number of the board.
+
+        Returns:
+            (group): Mask of the points connected to (i, j) that have the same piece type.
+
+        """
+        p = i * self.size + j
+        group_id = self.group_ids[p]
+        if group_id:
+            return self.groups[group_id][1]
+        return self.bitboard.flood_fill(self.bitboard.point_masks[p], self.empty_mask)
+
+    def detect_neighbor_ally(self, i, j):
+        '''
+        Detect the neighbor allies of a given stone.
+
+        :param i: row number of the board.
+        :param j: column number of the board.
+        :return: a list containing the neighbored allies row and column (row, column) of position (i, j).
+        '''
+        piece_type = self._board[i][j]
+        within = self.stones[piece_type] if piece_type else self.empty_mask
+        # Neighbors having the same color
+        return self.bitboard.to_points(self.bitboard.neighbor_masks[i * self.size + j] & within)
+
+    def ally_dfs(self, i, j):
+        '''
+        Using DFS to search for all allies of a given stone.
+
+        :param i: row number of the board.
+        :param j: column number of the board.
+        :return: a list containing the all allies row and column (row, column) of position (i, j).
+        '''
+        # The search is a flood fill over the stone mask of the same color
+        return self.bitboard.to_points(self.group_mask(i, j))
+
+    def find_liberty(self, i, j):
+        '''
+        Find liberty of a given stone. If a group of allied stones has no liberty, they all die.
+
+        :param i: row number of the board.
+        :param j: column number of the board.
+        :return: boolean indicating whether the given stone still has liberty.
+        '''
+        # The group table keeps the liberties of every allied group
+        group_id = self.group_ids[i * self.size + j]
+        if group_id:
+            return self.groups[group_id][2] != 0
+        # An empty point is part of an empty region, which has liberty if one of its points has an empty neighbor
+        return self.bitboard.adjacent(self.group_mask(i, j)) & self.empty_mask != 0
+
+    def find_died_pieces(self, piece_type):
+        '''
+        Find the died stones that has no liberty in the board for a given piece type.
+
+        :param piece_type: 1('X') or 2('O').
+        :return: a list containing the dead pieces row and column(row, column).
+        '''
+        died_pieces = 0
+
+        # Only the group records are read, a group dies when its liberty mask is empty
+        for group_type, group_stones, liberties in self.groups.values():
+            if group_type == piece_type and not liberties:
+                died_pieces |= group_stones
+        return self.bitboard.to_points(died_pieces)
+
+    def remove_died_pieces(self, piece_type):
+        '''
+        Remove the dead stones in the board.
+
+        :param piece_type: 1('X') or 2('O').
+        :return: locations of dead pieces.
+        '''
+
+        died_pieces = self.find_died_pieces(piece_type)
+        if not died_pieces: return []
+        self.remove_certain_pieces(died_pieces)
+        return died_pieces
+
+    def remove_certain_pieces(self, positions):
+        '''
+        Remove the stones of certain locations.
+
+        :param positions: a list containing the pieces to be removed row and column(row, column)
+        :return: None.
+        '''
+        bitboard = self.bitboard
+        board = self._board
+        stones = self.stones
+        groups = self.groups
+        group_ids = self.group_ids
+        removed = 0
+        for piece in positions:
+            if board[piece[0]][piece[1]]:
+                p = piece[0] * self.size + piece[1]
+                stones[board[piece[0]][piece[1]]] &= ~bitboard.point_masks[p]
+                self._zobrist_hash ^= bitboard.zobrist_keys[board[piece[0]][piece[1]]][p]
+                removed |= bitboard.point_masks[p]
+            board[piece[0]][piece[1]] = 0
+
+        if not removed:
+            return
+
+        # Drop the groups of the removed stones. Removing only a part of a group may split it, so the table is rebuilt.
+        removed_indexes = bitboard.to_indexes(removed)
+        for group_id in {group_ids[p] for p in removed_indexes}:
+            if groups.pop(group_id)[1] & ~removed:
+                self.build_groups()
+                return
+        for p in removed_indexes:
+            group_ids[p] = 0
+
+        # The removed points become liberties of the groups next to them
+        bordering = bitboard.neighbors(removed) & (stones[1] | stones[2])
+        for group_id in {group_ids[q] for q in bitboard.to_indexes(bordering)}:
+            group_type, group_stones, liberties = groups[group_id]
+            groups[group_id] = (group_type, group_stones, liberties | (bitboard.neighbors(group_stones) & removed))
+
+    def place_chess(self, i, j, piece_type):
+        '''
+        Place a chess stone in the board.
+
+        :param i: row number of the board.
+        :param j: column number of the board.
+        :param piece_type: 1('X') or 2('O').
+        :return: boolean indicating whether the placement is valid.
+        '''
+        valid_place = self.valid_place_check(i, j, piece_type)
+        if not valid_place:
+            return False
+        # Only the position key of the previous board is kept, the board itself is rebuilt when needed
+        self.position_history.append(self._zobrist_hash)
+        self.previous_key = self.position_key
+        self.previous_hash = self._zobrist_hash
+        self._previous_board = None
+        self.add_stone(i, j, piece_type)
+        # Remove the following line for HW2 CS561 S2020
+        # self.n_move += 1
+        return True
+
+    def make_move(self, i, j, piece_type):
+        """
+        Method to play a move in place: places the stone, removes the captured stones of the opponent and updates the
+        died pieces. The move can be taken back with unmake_move, so a search can work on a single board.
+
+        Args:
+            i(int): Row number of the board.
+            j(int): Column number of the board.
+            piece_type(int): 1('X') or 2('O').
+
+        Returns:
+            (success): Whether the move was valid. Nothing is changed or recorded for an invalid move.
+
+        """
+        if not self.valid_place_check(i, j, piece_type, test_check=True):
+            return False
+
+        self.undo_stack.append((i, j, piece_type, self.previous_key, self.previous_hash, self._previous_board,
+                                self.died_pieces, self.groups.copy(), self.group_ids[:], self.next_group_id,
+                                self._zobrist_hash))
+        self.position_history.append(self._zobrist_hash)
+        self.previous_key = self.position_key
+        self.previous_hash = self._zobrist_hash
+        self._previous_board = None
+        self.add_stone(i, j, piece_type)
+        self.died_pieces = self.remove_died_pieces(3 - piece_type)
+        return True
+
+    def unmake_move(self):
+        """
+        Method to take back the last move played with make_move, restoring the placed stone, the captured stones, the
+        previous board and the died pieces.
+        """
+        i, j, piece_type, previous_key, previous_hash, previous_board, died_pieces, groups, group_ids, next_group_id, \
+            zobrist_hash = self.undo_stack.pop()
+        board = self._board
+        stones = self.stones
+        point_masks = self.bitboard.point_masks
+
+        board[i][j] = 0
+        stones[piece_type] &= ~point_masks[i * self.size + j]
+        for piece in self.died_pieces:
+            board[piece[0]][piece[1]] = 3 - piece_type
+            stones[3 - piece_type] |= point_masks[piece[0] * self.size + piece[1]]
+
+        self.position_history.pop()
+        self.previous_key = previous_key
+        self.previous_hash = previous_hash
+        self._previous_board = previous_board
+        self._zobrist_hash = zobrist_hash
+        self.died_pieces = died_pieces
+        self.groups = groups
+        self.group_ids = group_ids
+        self.next_group_id = next_group_id
+
+    def valid_place_check(self, i, j, piece_type, test_check=False):
+        '''
+        Check whether a placement is valid.
+
+        :param i: row number of the board.
+        :param j: column number of the board.
+        :param piece_type: 1(white piece) or 2(black piece).
+        :param test_check: boolean if it's a test check.
+        :return: boolean indicating whether the placement is valid.
+        '''
+        board = self.board
+        verbose = self.verbose
+        if test_check:
+            verbose = False
+
+        # Check if the place is in the board range
+        if not (i >= 0 and i < len(board)):
+            if verbose:
+                print(('Invalid placement. row should be in the range 1 to {}.').format(len(board) - 1))
+            return False
+        if not (j >= 0 and j < len(board)):
+            if verbose:
+                print(('Invalid placement. column should be in the range 1 to {}.').format(len(board) - 1))
+            return False
+
+        # Check if the place already has a piece
+        if board[i][j] != 0:
+            if verbose:
+                print('Invalid placement. There is already a chess in this position.')
+            return False
+
+        # Check the liberty and KO rules from the group table, without placing the stone
+        error = self.check_placement(i * self.size + j, piece_type)
+        if error:
+            if verbose:
+                print(error)
+            return False
+        return True
+
+    def check_placement(self, p, piece_type):
+        """
+        Method to check the liberty, KO and superko rules for a stone placed on an empty point. The neighbors of the
+        point are read from the group table, so the board is neither copied nor modified.
+
+        Args:
+            p(int): Bit index of the empty point.
+            piece_type(int): 1('X') or 2('O').
+
+        Returns:
+            (error): Reason why the placement is invalid, None if it is valid.
+
+        """
+        bitboard = self.bitboard
+        groups = self.groups
+        group_ids = self.group_ids
+        bit = bitboard.point_masks[p]
+
+        # The place has liberty if it has an empty neighbor or joins a friendly group with another liberty. Such a
+        # placement cannot repeat the previous board, but it can still repeat an earlier one (superko rule).
+        if bitboard.neighbor_masks[p] & self.empty_mask:
+            return self.check_superko(p, piece_type) if self.superko else None
+        own_group = bit
+        for q in bitboard.neighbor_indexes[p]:
+            group_type, group_stones, liberties = groups[group_ids[q]]
+            if group_type == piece_type:
+                if liberties & ~bit:
+                    return self.check_superko(p, piece_type) if self.superko else None
+                own_group |= group_stones
+
+        # If not, the opponent groups left without liberty are removed and the place needs one of them as a neighbor
+        captured = self.get_captured(p, piece_type)
+        if not bitboard.neighbors(own_group) & captured:
+            return 'Invalid placement. No liberty found in this position.'
+
+        # Check special case: repeat placement causing the repeat board state (KO rule)
+        if self.died_pieces and self.previous_hash == self.get_placement_hash(p, piece_type, captured):
+            return 'Invalid placement. A repeat move not permitted by the KO rule.'
+        return self.check_superko(p, piece_type, captured) if self.superko else None
+
+    def get_captured(self, p, piece_type):
+        """
+        Method to get the opponent stones a stone placed on an empty point would capture.
+
+        Args:
+            p(int): Bit index of the empty point.
+            piece_type(int): 1('X') or 2('O').
+
+        Returns:
+            (captured): Mask of the opponent groups whose only liberty is the point.
+
+        """
+        bit = self.bitboard.point_masks[p]
+        captured = 0
+        for group_type, group_stones, liberties in self.groups.values():
+            if group_type != piece_type and not liberties & ~bit:
+                captured |= group_stones
+        return captured
+
+    def get_placement_hash(self, p, piece_type, captured):
+        """
+        Method to get the Zobrist hash of the board after a placement, without playing it.
+
+        Args:
+            p(int): Bit index of the empty point.
+            piece_type(int): 1('X') or 2('O').
+            captured(int): Mask of the opponent stones the placement captures.
+
+        Returns:
+            (zobrist_hash): Zobrist hash of the resulting board.
+
+        """
+        zobrist_hash = self._zobrist_hash ^ self.bitboard.zobrist_keys[piece_type][p]
+        opponent_keys = self.bitboard.zobrist_keys[3 - piece_type]
+        for q in self.bitboard.to_indexes(captured):
+            zobrist_hash ^= opponent_keys[q]
+        return zobrist_hash
+
+    def check_superko(self, p, piece_type, captured=None):
+        """
+        Method to check the superko rule for a stone placed on an empty point: the resulting board may not repeat any
+        earlier board of the game.
+
+        Args:
+            p(int): Bit index of the empty point.
+            piece_type(int): 1('X') or 2('O').
+            captured(int): Mask of the opponent stones the placement captures. Defaults to None (found here).
+
+        Returns:
+            (error): Reason why the placement is invalid, None if it is valid.
+
+        """
+        if captured is None:
+            captured = self.get_captured(p, piece_type)
+        if self.get_placement_hash(p, piece_type, captured) in self.position_history:
+            return 'Invalid placement. A repeat board state not permitted by the superko rule.'
+        return None
+
+    def legal_mask(self, piece_type):
+        """
+        Method to get all the valid placements for a piece type as a bit mask.
+
+        Args:
+            piece_type(int): 1('X') or 2('O').
+
+        Returns:
+            (mask): Mask of the valid placements.
+
+        """
+        bitboard = self.bitboard
+        empty_mask = self.empty_mask
+        # An empty point with an empty neighbor always has a liberty, only the other points need the full check. With
+        # the superko rule any placement can repeat an earlier board, so every point is checked.
+        mask = 0 if self.superko else empty_mask & bitboard.adjacent(empty_mask)
+        check_placement = self.check_placement
+        for p in bitboard.to_indexes(empty_mask & ~mask):
+            if check_placement(p, piece_type) is None:
+                mask |= bitboard.point_masks[p]
+        return mask
+
+    def legal_moves(self, piece_type):
+        """
+        Method to get all the valid placements for a piece type in one pass over the empty points.
+
+        Args:
+            piece_type(int): 1('X') or 2('O').
+
+        Returns:
+            (moves): List of (row, column) of the valid placements in raster order.
+
+        """
+        points = self.bitboard.points
+        check_placement = self.check_placement
+        return [points[p] for p in self.bitboard.to_indexes(self.empty_mask) if check_placement(p, piece_type) is None]
+
+    def update_board(self, new_board):
+        '''
+        Update the board with new_board
+
+        :param new_board: new board.
+        :return: None.
+        '''
+        # Assigning the board resynchronizes the stone masks
+        self.board = new_board
+
+    def visualize_board(self):
+        '''
+        Visualize the board.
+
+        :return: None
+        '''
+        board = self.board
+
+        print('-' * len(board) * 2)
+        for i in range(len(board)):
+            for j in range(len(board)):
+                if board[i][j] == 0:
+                    print(' ', end=' ')
+                elif board[i][j] == 1:
+                    print('X', end=' ')
+                else:
+                    print('O', end=' ')
+            print()
+        print('-' * len(board) * 2)
+
+    def game_end(self, piece_type, action="MOVE"):
+        '''
+        Check if the game should end.
+
+        :param piece_type: 1('X') or 2('O').
+        :param action: "MOVE" or "PASS".
+        :return: boolean indicating whether the game should end.
+        '''
+
+        # Case 1: max move reached
+        if self.n_move >= self.max_move:
+            return True
+        # Case 2: two players all pass the move.
+        if action == "PASS" and self.previous_hash == self._zobrist_hash:
+            return True
+        return False
+
+    def score(self, piece_type):
+        '''
+        Get score of a player by counting the number of stones.
+
+        :param piece_type: 1('X') or 2('O').
+        :return: boolean indicating whether the game should end.
+        '''
+
+        return popcount(self.stones[piece_type])
+
+    def unique_liberties(self, piece_type):
+        """
+        Method to get the number of empty points adjacent to the stones of a piece type, counting every point once even
+        if it is a liberty of several stones or groups.
+
+        Args:
+            piece_type(int): 1('X') or 2('O').
+
+        Returns:
+            (count): Number of distinct liberties of the piece type.
+
+        """
+        return popcount(self.bitboard.neighbors(self.stones[piece_type]) & self.empty_mask)
+
+    def judge_winner(self):
+        '''
+        Judge the winner of the game by number of pieces for each player.
+
+        :param: None.
+        :return: piece type of winner of the game (0 if it's a tie).
+        '''
+
+        cnt_1 = self.score(1)
+        cnt_2 = self.score(2)
+        if cnt_1 > cnt_2 + self.komi: return 1
+        elif cnt_1 < cnt_2 + self.komi: return 2
+        else: return 0
+
+    def play(self, player1, player2, verbose=False):
+        '''
+        The game starts!
+
+        :param player1: Player instance.
+        :param player2: Player instance.
+        :param verbose: whether print input hint and error information
+        :return: piece type of winner of the game (0 if it's a tie).
+        '''
+        self.init_board(self.size)
+        # Print input hints and error message if there is a manual player
+        if player1.type == 'manual' or player2.type == 'manual':
+            self.verbose = True
+            print('----------Input "exit" to exit the program----------')
+            print('X stands for black chess, O stands for white chess.')
+            self.visualize_board()
+
+        verbose = self.verbose
+        # Game starts!
+        while 1:
+            piece_type = 1 if self.X_move else 2
+
+            # Judge if the game should end
+            if self.game_end(piece_type):
+                result = self.judge_winner()
+                if verbose:
+                    print('Game ended.')
+                    if result == 0:
+                        print('The game is a tie.')
+                    else:
+                        print('The winner is {}'.format('X' if result == 1 else 'O'))
+                return result
+
+            if verbose:
+                player = "X" if piece_type == 1 else "O"
+                print(player + " makes move...")
+
+            # Game continues
+            if piece_type == 1: action = player1.get_input(self, piece_type)
+            else: action = player2.get_input(self, piece_type)
+
+            if verbose:
+                player = "X" if piece_type == 1 else "O"
+                print(action)
+
+            if action != "PASS":
+                # If invalid input, continue the loop. Else it places a chess on the board.
+                if not self.place_chess(action[0], action[1], piece_type):
+                    if verbose:
+                        self.visualize_board()
+                    continue
+
+                self.died_pieces = self.remove_died_pieces(3 - piece_type) # Remove the dead pieces of opponent
+            else:
+                self.previous_board = deepcopy(self.board)
+
+            if verbose:
+                self.visualize_board() # Visualize the board again
+                print()
+
+            self.n_move += 1
+            self.X_move = not self.X_move # Players take turn
+
+    def train(self, player1, player2, num_games=10):
+        """
+        Method to train a Q learning agent by playing a series of games against another player.
+
+        Args:
+            player1(GoPlayer): Instance of player 1.
+            player2(str): Type of agent for player 2. Defaults to "random-player".
+
+        """
+        self.init_board(self.size)
+
+        if player1.type == "q-player" or player2.type == "q-player":
+            self.verbose = True
+            self.visualize_board()
+
+        verbose = self.verbose
+        games_played = 0
+        # Game starts!
+        while games_played < num_games:
+            piece_type = 1 if self.X_move else 2
+
+            # Judge if the game should end
+            if self.game_end(piece_type):
+                result = self.judge_winner()
+                if verbose:
+                    print('Game ended.')
+                    if result == 0:
+                        print('The game is a tie.')
+                    else:
+                        print('The winner is {}'.format('X' if result == 1 else 'O'))
+                return result
+
+            if verbose:
+                player = "X" if piece_type == 1 else "O"
+                print(player + " makes move...")
+
+            # Game continues
+            if piece_type == 1: action = player1.get_agent_action(self, piece_type)
+            else: action = player2.get_agent_action(self, piece_type)
+
+            if verbose:
+                player = "X" if piece_type == 1 else "O"
+                print(action)
+
+            if action != "PASS":
+                # If invalid input, continue the loop. Else it places a chess on the board.
+                if not self.place_chess(action[0], action[1], piece_type):
+                    if verbose:
+                        self.visualize_board()
+                    continue
+
+                self.died_pieces = self.remove_died_pieces(3 - piece_type) # Remove the dead pieces of opponent
+            else:
+                self.previous_board = deepcopy(self.board)
+
+            if verbose:
+                self.visualize_board() # Visualize the board again
+                print()
+
+            self.n_move += 1
+            self.X_move = not self.X_move # Players take turn
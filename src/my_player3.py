@@ -1,51 +1,56 @@
 import time
 
-from alpha_beta_player import AlphaBetaPlayer
-from q_player import QPlayer
+from engine_client import request_action
 from read import readInput
 from write import writeOutput
 
-from host import GO
-
 
 TURN_FILE = "turn_number.txt"
+TIME_LIMIT = 8.0 # Seconds of search per move, leaving a margin to the per move time limit of the host
 
 
 if __name__ == "__main__":
     player_type = "ALPHA_BETA"
     N = 5
-    MAX_DEPTH = 3
+    max_move = N * N - 1 # As in GO, read here so a move played by the engine daemon does not load host.py
     piece_type, previous_board, board = readInput(N)
-    go = GO(N)
-    go.set_board(piece_type, previous_board, board)
 
     turn_number = 1
     with open(TURN_FILE, 'r') as turn_file:
         turn_number = int(turn_file.readlines()[0])
 
     actual_turn = turn_number * 2 - 1 if piece_type == 1 else turn_number * 2
-    depth = MAX_DEPTH if go.max_move - actual_turn + 1 >= MAX_DEPTH else go.max_move - actual_turn + 1
-    print("Turn: {}. Depth: {}".format(actual_turn, depth))
+    print("Turn: {}. Max depth: {}".format(actual_turn, max_move - actual_turn + 1))
 
-    action = "PASS"
     start = time.time()
-    if board[int(N / 2)][int(N / 2)] == 0 and actual_turn <= 2:
-        action = (2, 2)
-    elif player_type == "ALPHA_BETA":
-        player = AlphaBetaPlayer()
-        action = player.get_agent_action(go, piece_type, depth)
-    elif player_type == "Q":
-        player = QPlayer(piece_type, "q_values.json")
-        action = player.get_agent_action(go, piece_type)
+    request = {"piece_type": piece_type, "previous_board": previous_board, "board": board, "turn": actual_turn,
+               "player_type": player_type, "time_limit": TIME_LIMIT}
+    # The engine daemon (engine_server.py) keeps the players loaded between moves. Without it, the engine is loaded
+    # here for this move only, with what is left of the time limit.
+    response = request_action(request)
+    if response is None:
+        from engine import Engine
+        action, stats = Engine(N).get_action(piece_type, previous_board, board, actual_turn, player_type,
+                                             max(0.0, TIME_LIMIT - (time.time() - start)))
+    else:
+        action, stats = response["action"], response["stats"]
+        print("Played by the engine daemon.")
+    if stats.get("book"):
+        print("Played from the opening book.")
+    if "solved" in stats:
+        print("Endgame solved: {}. Nodes: {}".format(stats["solved"], stats["endgame_nodes"]))
+    if "ponder" in stats:
+        print("Pondering: {}".format(stats["ponder"]))
+    if "depth" in stats:
+        print("Depth searched: {}. Nodes: {}".format(stats["depth"], stats["nodes"]))
+        print("Transposition table: {}".format(stats["transposition_table"]))
     end = time.time()
     print("Time taken: {}".format(end - start))
 
     writeOutput(action)
 
     with open(TURN_FILE, 'w') as turn_file:
-        if (actual_turn + 2 > go.max_move):
+        if (actual_turn + 2 > max_move):
             turn_file.write(str(1))
         else:
             turn_file.write(str(turn_number + 1))
-
-    actual_turn = turn_number * 2 - 1
@@ -0,0 +1,256 @@
+import os
+import struct
+import time
+
+from symmetry import get_symmetries
+
+from go_board import GO
+
+
+OPENING_BOOK_PATH = "opening_book.bin"
+MAGIC = b"GOB1"
+VERSION = 1
+HEADER = struct.Struct("<4sIHHI") # Magic, version, board size, plies, number of slots
+SLOT = struct.Struct("<QB") # Book key (0 for an empty slot), point of the action on the canonical board
+HASH_MULTIPLIER = 0x9E3779B97F4A7C15 # Spreads the book keys over the slots (Fibonacci hashing)
+
+
+def get_book_key(state, piece_type):
+    """
+    Method to get the key of a position in the opening book.
+
+    Args:
+        state(str): Encoded canonical state of the board.
+        piece_type(int): Type of piece to move. 1('X') or 2('O').
+
+    Returns:
+        (key): Nonzero integer packing the state in base 3 and the piece type.
+
+    """
+    return int(state, 3) * 2 + piece_type
+
+
+def get_slot(key, slot_bits):
+    """
+    Method to get the first slot probed for a key.
+
+    Args:
+        key(int): Book key.
+        slot_bits(int): Base 2 logarithm of the number of slots.
+
+    Returns:
+        (slot): Index of the slot.
+
+    """
+    return ((key * HASH_MULTIPLIER) & 0xFFFFFFFFFFFFFFFF) >> (64 - slot_bits) if slot_bits else 0
+
+
+def write_opening_book(path, book, board_size=5, plies=0):
+    """
+    Method to write an opening book as an open addressing hash table with linear probing, filled at most to half, so a
+    lookup reads one or two slots. The file is written to a temporary path and renamed.
+
+    Args:
+        path(str): Path of the file.
+        book(dict): Book key -> point of the action on the canonical board, board_size * board_size for a PASS. Other
+            tables of nonzero keys and byte values can be written too.
+        board_size(int): Size of the Go board. Defaults to 5.
+        plies(int): Number of plies the book covers, stored in the header. Defaults to 0.
+
+    """
+    slot_bits = max(1, (2 * len(book) - 1).bit_length())
+    num_slots = 1 << slot_bits
+    slots = [(0, 0)] * num_slots
+    for key, point in book.items():
+        slot = get_slot(key, slot_bits)
+        while slots[slot][0]:
+            slot = (slot + 1) % num_slots
+        slots[slot] = (key, point)
+
+    temp_path = path + ".tmp"
+    with open(temp_path, 'wb') as book_file:
+        book_file.write(HEADER.pack(MAGIC, VERSION, board_size, plies, num_slots))
+        book_file.write(b"".join(SLOT.pack(key, point) for key, point in slots))
+    os.replace(temp_path, path)
+
+
+class OpeningBook():
+    """
+    Opening book read from the file written by write_opening_book. Positions are looked up by their canonical state,
+    so one entry covers the 8 symmetric positions.
+    """
+
+    def __init__(self, path=OPENING_BOOK_PATH):
+        """
+        Method to read an opening book. A missing file, or no path, gives an empty book.
+
+        Args:
+            path(str): Path of the file, None for an empty book. Defaults to OPENING_BOOK_PATH.
+
+        """
+        self.buffer = b""
+        self.num_slots = 0
+        self.plies = 0
+        if path is None or not os.path.exists(path):
+            return
+
+        with open(path, 'rb') as book_file:
+            buffer = book_file.read()
+        if len(buffer) < HEADER.size:
+            raise ValueError("{} is too short to be an opening book.".format(path))
+        magic, version, self.board_size, self.plies, num_slots = HEADER.unpack_from(buffer)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("{} is not an opening book.".format(path))
+        if num_slots & (num_slots - 1) or len(buffer) != HEADER.size + num_slots * SLOT.size:
+            raise ValueError("{} is truncated.".format(path))
+
+        self.buffer = buffer
+        self.num_slots = num_slots
+        self.slot_bits = num_slots.bit_length() - 1
+        self.symmetries = get_symmetries(self.board_size)
+
+    def lookup(self, state, piece_type):
+        """
+        Method to look up the action of a canonical position.
+
+        Args:
+            state(str): Encoded canonical state of the board.
+            piece_type(int): Type of piece to move. 1('X') or 2('O').
+
+        Returns:
+            (point): Point of the action on the canonical board, board_size * board_size for a PASS. None if the
+                position is not in the book.
+
+        """
+        return self.get(get_book_key(state, piece_type))
+
+    def get(self, key):
+        """
+        Method to look up the byte stored for a key.
+
+        Args:
+            key(int): Nonzero key.
+
+        Returns:
+            (value): Stored byte, None if the key is not in the file.
+
+        """
+        if not self.num_slots:
+            return None
+        slot = get_slot(key, self.slot_bits)
+        while True:
+            slot_key, value = SLOT.unpack_from(self.buffer, HEADER.size + slot * SLOT.size)
+            if slot_key == key:
+                return value
+            if not slot_key:
+                return None
+            slot = (slot + 1) % self.num_slots
+
+    def get_action(self, go, piece_type):
+        """
+        Method to get the book action of a position.
+
+        Args:
+            go(GO): Instance of the Go board.
+            piece_type(int): Type of piece to move. 1('X') or 2('O').
+
+        Returns:
+            (action): (row, column) or "PASS". None if the position is not in the book, or if the book action is not
+                valid on this board (a KO the canonical state does not record).
+
+        """
+        if not self.num_slots or go.size != self.board_size:
+            return None
+        canonical_state, t = self.symmetries.canonicalize(go.encoded_state)
+        point = self.lookup(canonical_state, piece_type)
+        if point is None:
+            return None
+        if point == go.size * go.size:
+            return "PASS"
+
+        action = divmod(self.symmetries.backward[t][point], go.size)
+        if not go.valid_place_check(action[0], action[1], piece_type, test_check=True):
+            return None
+        return action
+
+
+def build_opening_book(plies, choose_action, board_size=5):
+    """
+    Method to find the book actions of the first plies of a game. For each piece type, the positions are the ones
+    reached when that side plays its book actions and the opponent plays any valid placement, merged by symmetry. The
+    opponent passing in the opening is not covered.
+
+    Args:
+        plies(int): Number of plies to cover, the book has the positions with fewer moves played.
+        choose_action(function): Function of (go, piece_type, ply) returning the action to store.
+        board_size(int): Size of the Go board. Defaults to 5.
+
+    Returns:
+        (book): Dictionary of book key -> point of the action on the canonical board.
+
+    """
+    symmetries = get_symmetries(board_size)
+    num_points = board_size * board_size
+    book = {}
+    for book_piece_type in (1, 2):
+        go = GO(board_size)
+        go.init_board(board_size)
+        positions = [go]
+        for ply in range(plies):
+            piece_type = 1 if ply % 2 == 0 else 2
+            next_positions = {}
+            for go in positions:
+                if piece_type == book_piece_type:
+                    canonical_state, t = symmetries.canonicalize(go.encoded_state)
+                    key = get_book_key(canonical_state, piece_type)
+                    action = choose_action(go, piece_type, ply)
+                    book[key] = num_points if action == "PASS" else symmetries.forward[t][action[0] * board_size +
+                                                                                           action[1]]
+                    actions = [] if action == "PASS" else [action]
+                else:
+                    actions = go.legal_moves(piece_type)
+
+                for i, j in actions:
+                    next_go = go.copy_board()
+                    next_go.place_chess(i, j, piece_type)
+                    next_go.died_pieces = next_go.remove_died_pieces(3 - piece_type)
+                    next_positions.setdefault(symmetries.canonicalize(next_go.encoded_state)[0], next_go)
+            positions = list(next_positions.values())
+            print("Piece type {}. Ply {}. Book size: {}. Positions at the next ply: {}".format(
+                book_piece_type, ply, len(book), len(positions)))
+    return book
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the opening book of my_player3.py.")
+    parser.add_argument("--plies", "-k", type=int, help="number of plies covered by the book", default=4)
+    parser.add_argument("--time", "-t", type=float, help="seconds of search per position", default=30.0)
+    parser.add_argument("--q-table", "-q", help="pick the actions with this Q table instead of searching")
+    parser.add_argument("--output", "-o", help="path of the book", default=OPENING_BOOK_PATH)
+    args = parser.parse_args()
+
+    if args.q_table:
+        from q_player import QPlayer
+
+        q_players = {piece_type: QPlayer(piece_type, args.q_table) for piece_type in (1, 2)}
+
+        def choose_action(go, piece_type, ply):
+            return q_players[piece_type].get_max_action(go, piece_type)[0]
+    else:
+        from alpha_beta_player import AlphaBetaPlayer
+
+        players = {piece_type: AlphaBetaPlayer() for piece_type in (1, 2)}
+
+        def choose_action(go, piece_type, ply):
+            # The center opening of my_player3.py is kept for the first move of each side.
+            n = go.size
+            if ply <= 1 and go.board[n // 2][n // 2] == 0:
+                return (n // 2, n // 2)
+            return players[piece_type].get_agent_action(go, piece_type, go.max_move - ply, args.time)
+
+    start = time.time()
+    book = build_opening_book(args.plies, choose_action)
+    write_opening_book(args.output, book, plies=args.plies)
+    print("Wrote {} positions to {} in {:.0f}s.".format(len(book), args.output, time.time() - start))
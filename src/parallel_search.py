@@ -0,0 +1,259 @@
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from alpha_beta_player import AlphaBetaPlayer, SearchTimeout, TT_MEMORY_MB
+from go_board import GO
+from transposition_table import TranspositionTable
+
+
+SHARED_PLIES = 3 # Plies below the root whose transposition table entries the workers send back to the player
+
+
+class WorkerTranspositionTable(TranspositionTable):
+    """
+    Transposition table of a worker process. It keeps the entries stored near the root of the current task, so they
+    can be sent back and merged into the table of the player.
+    """
+
+    def __init__(self, memory_mb=TT_MEMORY_MB):
+        """
+        Method to initialize the worker table.
+
+        Args:
+            memory_mb(float): Memory budget of the table in megabytes. Defaults to 64.
+
+        """
+        super().__init__(memory_mb)
+        self.share_depth = None # Min depth of the entries kept, None to keep none
+        self.shared_entries = [] # (key, depth, value, bound, move) of the entries kept
+
+    def store(self, key, depth, value, bound, move):
+        """
+        Method to store the result of a search, keeping it to send back if it is near the root of the task.
+
+        Args:
+            key(int): Search key of the position.
+            depth(int): Depth the position was searched to.
+            value(float): Value found by the search.
+            bound(int): Whether the value is EXACT, a LOWER_BOUND or an UPPER_BOUND.
+            move(tuple): Best move found by the search.
+
+        """
+        super().store(key, depth, value, bound, move)
+        if self.share_depth is not None and depth >= self.share_depth:
+            self.shared_entries.append((key, depth, value, bound, move))
+
+
+_worker_player = None
+
+
+def _init_worker(tt_memory_mb, move_ordering):
+    """
+    Method to create the search player of a worker process. Its transposition table is kept for the lifetime of the
+    worker, so every root action a worker searches benefits from the positions of its earlier tasks.
+
+    Args:
+        tt_memory_mb(float): Memory budget of the transposition table of the worker in megabytes.
+        move_ordering(bool): Whether the worker orders the actions of every node.
+
+    """
+    global _worker_player
+    _worker_player = AlphaBetaPlayer(tt_memory_mb, move_ordering)
+    _worker_player.transposition_table = WorkerTranspositionTable(tt_memory_mb)
+
+
+def _search_action(go, piece_type, action, depth, alpha, deadline, generation):
+    """
+    Method run by a worker to search one root action. The entries the worker stored in the top SHARED_PLIES plies of
+    its search are sent back with the result.
+
+    Args:
+        go(GO): Instance of the Go board at the root.
+        piece_type(int): Type of piece the player agent is playing as. 1('X') or 2('O').
+        action(tuple): Root action to search.
+        depth(int): Depth of the root search.
+        alpha(float): Value the action has to beat to become the best action.
+        deadline(float): Time after which the search stops, None for no limit.
+        generation(int): Search generation of the master, so that the worker table ages its entries the same way.
+
+    Returns:
+        (action, value, nodes, entries): The action, its value (at most alpha if it is not better, None if the deadline
+            passed), the number of nodes searched and the (key, depth, value, bound, move) of the entries sent back.
+
+    """
+    player = _worker_player
+    if player.transposition_table.generation != generation:
+        player.prepare_search(go)
+        player.transposition_table.generation = generation
+    player.deadline = deadline
+    player.nodes = 0
+    player.transposition_table.share_depth = max(1, depth - SHARED_PLIES)
+    player.transposition_table.shared_entries = []
+
+    go.make_move(action[0], action[1], piece_type)
+    try:
+        _, value = player.min_action(go, piece_type, depth - 1, alpha, float("inf"))
+    except SearchTimeout:
+        value = None
+    # Entries of a search cut by the deadline are still valid, only the unfinished nodes were not stored.
+    return action, value, player.nodes, player.transposition_table.shared_entries
+
+
+class ParallelAlphaBetaPlayer(AlphaBetaPlayer):
+    """
+    Alpha-beta player that splits the root actions across worker processes. The first root action is searched by the
+    player itself (young brothers wait), then the other actions are searched by the workers against its value. Among
+    the actions that beat it, the workers return exact values, so the best action is the same as the serial search at
+    the same depth and with the same root order. Every worker has its own transposition table: the entries near the
+    root of its tasks are merged into the table of the player, which orders the next iterations with them, but the
+    workers do not see each other's entries while they search.
+    """
+
+    def __init__(self, num_workers=None, tt_memory_mb=TT_MEMORY_MB, move_ordering=True):
+        """
+        Method to initialize the parallel alpha-beta player.
+
+        Args:
+            num_workers(int): Number of worker processes. Defaults to None (one per CPU core).
+            tt_memory_mb(float): Memory budget of the transposition table of the player and of every worker in
+                megabytes. Defaults to 64.
+            move_ordering(bool): Whether to order the actions of every node. Defaults to True.
+
+        """
+        super().__init__(tt_memory_mb, move_ordering)
+        self.type = 'parallel-alpha-beta'
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.tt_memory_mb = tt_memory_mb
+        self.executor = None
+
+    def close(self):
+        """
+        Method to stop the worker processes.
+        """
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def search_root(self, go, piece_type, depth, first_action=None):
+        """
+        Method to run one iteration of the search, splitting the root actions across the workers.
+
+        Args:
+            go(GO): Instance of the Go board.
+            piece_type(int): Type of piece the player agent is playing as. 1('X') or 2('O').
+            depth(int): Number of steps to look ahead in the game state tree for.
+            first_action(tuple): Action to try first, usually the best action of the previous iteration.
+
+        Returns:
+            ((row, column), value): Best action and its utility value.
+
+        """
+        if self.num_workers <= 1 or depth <= 1:
+            return super().search_root(go, piece_type, depth, first_action)
+
+        key = go.search_key(piece_type)
+        tt_move, _ = self.probe_transposition(key, depth, float("-inf"), float("inf"))
+        if tt_move is None and first_action != "PASS":
+            tt_move = first_action
+        actions = self.get_ordered_actions(go, piece_type, tt_move)
+        if not actions:
+            return "PASS", float("-inf")
+
+        # The eldest brother is searched here, its value is the bound the younger brothers have to beat.
+        best_action = actions[0]
+        go.make_move(best_action[0], best_action[1], piece_type)
+        _, best_value = self.min_action(go, piece_type, depth - 1, float("-inf"), float("inf"))
+        go.unmake_move()
+
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(self.num_workers, initializer=_init_worker,
+                                                initargs=(self.tt_memory_mb, self.move_ordering))
+        futures = [self.executor.submit(_search_action, go, piece_type, action, depth, best_value, self.deadline,
+                                        self.transposition_table.generation) for action in actions[1:]]
+
+        timed_out = False
+        for future in futures:
+            action, value, nodes, entries = future.result()
+            self.nodes += nodes
+            for entry_key, entry_depth, entry_value, bound, move in entries:
+                self.transposition_table.store(entry_key, entry_depth, entry_value, bound, move)
+            if value is None:
+                timed_out = True
+            elif value > best_value:
+                best_action, best_value = action, value
+        if timed_out:
+            raise SearchTimeout()
+
+        self.store_transposition(key, depth, best_action, best_value, float("-inf"), float("inf"))
+        return best_action, best_value
+
+
+def get_sample_positions(num_positions, board_size=5, seed=0):
+    """
+    Method to get positions for benchmarking by playing random moves from the empty board.
+
+    Args:
+        num_positions(int): Number of positions.
+        board_size(int): Size of the Go board. Defaults to 5.
+        seed(int): Seed of the random moves. Defaults to 0.
+
+    Returns:
+        (positions): List of (go, piece_type) with the piece type to move.
+
+    """
+    rng = random.Random(seed)
+    positions = []
+    for _ in range(num_positions):
+        go = GO(board_size)
+        go.init_board(board_size)
+        piece_type = 1
+        for _ in range(rng.randint(2, 8)):
+            moves = go.legal_moves(piece_type)
+            if not moves:
+                break
+            move = rng.choice(moves)
+            go.place_chess(move[0], move[1], piece_type)
+            go.died_pieces = go.remove_died_pieces(3 - piece_type)
+            piece_type = 3 - piece_type
+        positions.append((go, piece_type))
+    return positions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--depth", "-d", type=int, help="search depth", default=4)
+    parser.add_argument("--positions", "-p", type=int, help="number of positions", default=8)
+    parser.add_argument("--workers", "-w", type=int, help="max number of workers", default=os.cpu_count())
+    args = parser.parse_args()
+
+    positions = get_sample_positions(args.positions)
+    worker_counts = sorted({args.workers} | {2 ** k for k in range(args.workers.bit_length())})
+
+    serial_actions = []
+    serial_time = 0
+    for go, piece_type in positions:
+        player = AlphaBetaPlayer()
+        player.prepare_search(go)
+        start = time.time()
+        serial_actions.append(player.search_root(go, piece_type, args.depth)[0])
+        serial_time += time.time() - start
+    print("Serial: {:.2f}s".format(serial_time))
+
+    for num_workers in worker_counts:
+        player = ParallelAlphaBetaPlayer(num_workers)
+        actions = []
+        elapsed = 0
+        for go, piece_type in positions:
+            # A fresh player state per position keeps the root order equal to the serial search.
+            player.transposition_table.clear()
+            player.history = [[], [], []]
+            player.prepare_search(go)
+            start = time.time()
+            actions.append(player.search_root(go, piece_type, args.depth)[0])
+            elapsed += time.time() - start
+        player.close()
+        print("Workers: {}. Time: {:.2f}s. Speedup: {:.2f}. Same actions as serial: {}".format(
+            num_workers, elapsed, serial_time / elapsed, actions == serial_actions))
@@ -1,36 +1,47 @@
 import copy
-import json
+import os
 import random
+import numpy as np
+from checkpoint import get_last_sequence, load_checkpoint
+from q_table_store import ArrayQValues, CompactQValues, EVICTION_FRACTION, FLAG_CANONICAL, dump_q_values
 from read import readInput
-from utils import get_rotated_state, get_flipped_state, get_equivalent_action
+from symmetry import canonicalize_q_values, get_symmetries
 from write import writeOutput
 
-from host import GO
+from go_board import GO
 
 
 Q_TABLE_PATH = "q_values.json"
+Q_TABLE_BINARY_PATH = "q_values.qtb" # Binary Q table converted from the JSON one with q_table_store.py
 
 WIN_REWARD = 1
 DRAW_REWARD = 0.5
 LOSS_REWARD = 0
 
+NO_VISITS = [0, 0] # Visits of a state that was loaded and not queried since
+
 
 class QPlayer():
     """
     Module that implements an agent that plays a miniature version of Go using the Q-learning algorithm.
     """
 
-    def __init__(self, piece_type, q_table_path=Q_TABLE_PATH, alpha=0.7, gamma=0.9, default_q_value=0.5, board_size=5):
+    def __init__(self, piece_type, q_table_path=Q_TABLE_PATH, alpha=0.7, gamma=0.9, default_q_value=0.5, board_size=5,
+                 batch_learning=False, max_states=None):
         """
         Method to initialize the Q-learning player.
 
         Args:
             piece_type(int): Piece type of the player. 1 -> Black, 2 -> White.
-            q_table_path(str): Path to the Q table file. Defaults to "q_values.json".
+            q_table_path(str): Path to the Q table file, either JSON or a binary Q table. Defaults to "q_values.json".
             alpha(float): Learning rate for the Q learning algorithm. Defaults to 0.7.
             gamma(float): Discount value for future rewards. Defaults to 0.9.
             default_q_value(float): Default Q value to use when we explore a new state. Defaults to 0.5.
             board_size(int): Size of the Go board. Defaults to 5.
+            batch_learning(bool): Whether to keep the Q values in a NumPy array and learn from whole games in vectorized
+                form. Defaults to False.
+            max_states(int): Maximum number of states in the table, None for no limit. Rows of a memory-mapped binary
+                table are not counted. Defaults to None.
 
         """
         self.type = "q-learner"
@@ -39,13 +50,33 @@ class QPlayer():
         self.gamma = gamma
         self.q_values = {}
         self.updated_q_values = {}
+        self.changed_q_values = {} # States updated since the last checkpoint -> Q values
+        self.update_counts = {} # States updated since the last merge into a shared table -> number of updates
 
-        with open(q_table_path, 'r') as q_values_file:
-            self.q_values = json.load(q_values_file)
+        self.q_values = load_checkpoint(q_table_path)
+        if not (isinstance(self.q_values, CompactQValues) and self.q_values.flags & FLAG_CANONICAL):
+            # Tables saved before states were canonicalized can hold several states of the same symmetry class.
+            self.q_values = canonicalize_q_values(self.q_values, board_size)
+        if batch_learning:
+            self.q_values = ArrayQValues.from_q_values(self.q_values, board_size, default_q_value)
 
         self.state_history = []
+        self.batch_history = [] # (canonical states, canonical cells) of every move of the batch being played
+        self.canonical_states = {} # Encoded state -> (canonical state, transform) of the states seen this game
         self.default_q_value = default_q_value
         self.board_size = board_size
+        self.symmetries = get_symmetries(board_size)
+        self.batch_permutations = np.array(self.symmetries.backward)
+        # Packs the boards of a batch into integers like int(state, 3), so the smallest one is the canonical state.
+        self.state_powers = 3 ** np.arange(board_size * board_size - 1, -1, -1, dtype=np.int64)
+
+        # Visit counts and evictions that keep the table under max_states.
+        self.max_states = None if isinstance(self.q_values, CompactQValues) else max_states
+        self.visits = {} # Canonical state -> [number of queries, time of the last query]
+        self.num_queries = 0
+        self.evictions = 0
+        self.evicted_states = 0
+        self.pruned_states = 0
 
 
     def set_piece_type(self, piece_type):
@@ -61,106 +92,165 @@ class QPlayer():
 
     def dump_values(self, q_table_path="q_values.json"):
         """
-        Method to dump the learned Q values into a JSON file.
+        Method to dump the learned Q values into a JSON file, or into a binary Q table if the path does not end with
+        ".json". The table holds the Q values of the delta checkpoints next to it, which are skipped when it is loaded.
 
         Args:
             q_table_path(str): Path to dump the Q values on to. Defaults to "q_values.json".
 
         """
-        with open(q_table_path, 'w') as q_values_file:
-            json.dump(self.q_values, q_values_file)
+        dump_q_values(q_table_path, self.q_values, self.board_size, FLAG_CANONICAL, get_last_sequence(q_table_path))
 
 
     def q(self, state):
         """
-        Method to get the Q values for a given Go state.
+        Method to get the Q values for a given Go state. The Q values of all the symmetric states are stored once, under
+        the canonical state of their symmetry class, so a query is a single lookup.
 
         Args:
             state(str): Encoded state of the Go board.
 
         Returns:
-            (q_values, equiv_state, h_flipped, v_flipped, num_rotations): Q values for the given Go board state, the
-                equivalent state, whether the state was horizontally flipped, whether the state was vertically flipped,
-                and the number of rotations to find the equivalent action.
+            (q_values, canonical_state, transform): Q values of the canonical state, the canonical state and the index
+                of the transform that maps the given state (and its actions) to the canonical state.
 
         """
-        equiv_state, h_flipped, v_flipped, num_rot = self.get_equivalent_state(state)
+        canonical_state, transform = self.get_canonical_state(state)
+        self.record_visit(canonical_state)
 
-        if equiv_state is None:
-            equiv_state = state
-            self.q_values[state] = [[self.default_q_value for _ in range(self.board_size)] for _ in
-                                    range(self.board_size)]
+        q_values = self.q_values.get(canonical_state)
+        if q_values is None:
+            self.make_room()
+            self.q_values[canonical_state] = [[self.default_q_value for _ in range(self.board_size)] for _ in
+                                              range(self.board_size)]
+            q_values = self.q_values[canonical_state]
 
-        return self.q_values[equiv_state], equiv_state, h_flipped, v_flipped, num_rot
+        return q_values, canonical_state, transform
 
 
-    def get_equivalent_state(self, state):
+    def record_visit(self, canonical_state):
         """
-        Method to get a state in the Q values which is symmetrically and rotationally equivalent to the given state.
+        Method to count a query of a state for the eviction order.
 
         Args:
-            state(str): State to get the rotational and symmetric equivalent for.
+            canonical_state(str): Canonical state queried.
 
-        Returns:
-            (equivalent_state, flip_horizontal, flip_vertical, rotation_amount): The equivalent state, whether the
-                original state is flipped horizontally, whether the original state was flipped vertically, number of
-                clockwise rotations to find the equivalent action.
+        """
+        self.num_queries += 1
+        visits = self.visits.get(canonical_state)
+        if visits is None:
+            self.visits[canonical_state] = [1, self.num_queries]
+        else:
+            visits[0] += 1
+            visits[1] = self.num_queries
 
+
+    def make_room(self):
+        """
+        Method to evict states before a new state is added, if the table is full.
         """
-        # Check rotated states without symmetry.
-        rotated_state, num_rotations = self.get_equivalent_rotated_state(state)
-        if rotated_state is not None:
-            return (rotated_state, False, False, num_rotations)
+        if self.max_states is not None and len(self.q_values) >= self.max_states:
+            self.evict_states()
+
 
-        # Check states with horizontal symmetry.
-        hf_state = get_flipped_state(state, self.board_size, True, False)
-        hf_r_state, num_rotations = self.get_equivalent_rotated_state(hf_state)
-        if hf_r_state is not None:
-            return (hf_r_state, True, False, num_rotations)
+    def evict_states(self):
+        """
+        Method to make room in a full table by evicting the least visited states, the least recently queried first
+        among equally visited ones. The visit counts are halved after every eviction, so states that were visited often
+        long ago can be evicted later. States of the current game are kept.
+        """
+        target = int(self.max_states * (1 - EVICTION_FRACTION))
+        current_states = {canonical_state for canonical_state, _ in self.canonical_states.values()}
+        candidates = [state for state in self.q_values.keys() if state not in current_states]
+        candidates.sort(key=lambda state: self.visits.get(state, NO_VISITS))
 
-        # Check states with vertical symmetry.
-        vf_state = get_flipped_state(state, self.board_size, False, True)
-        vf_r_state, num_rotations = self.get_equivalent_rotated_state(vf_state)
-        if vf_r_state is not None:
-            return (vf_r_state, False, True, num_rotations)
+        evicted = candidates[:max(0, len(self.q_values) - target)]
+        for state in evicted:
+            self.remove_state(state)
+        for visits in self.visits.values():
+            visits[0] //= 2
 
-        # Check states with horizontal and vertical symmetry.
-        hvf_state = get_flipped_state(state, self.board_size, True, True)
-        hvf_r_state, num_rotations = self.get_equivalent_rotated_state(hvf_state)
-        if hvf_r_state is not None:
-            return (hvf_r_state, True, True, num_rotations)
+        self.evictions += 1
+        self.evicted_states += len(evicted)
+
+
+    def prune_default_states(self):
+        """
+        Method to remove the states whose Q values all still equal the default Q value, as a query gives them again.
+        States of the current game are kept.
+
+        Returns:
+            (num_pruned): Number of states removed.
+
+        """
+        if isinstance(self.q_values, CompactQValues):
+            return 0
+
+        if isinstance(self.q_values, ArrayQValues):
+            default_states = self.q_values.get_default_states()
+        else:
+            default_states = [state for state, values in self.q_values.items()
+                              if all(value == self.default_q_value for row in values for value in row)]
+        current_states = {canonical_state for canonical_state, _ in self.canonical_states.values()}
 
-        return (None, False, False, 0)
+        num_pruned = 0
+        for state in default_states:
+            if state not in current_states:
+                self.remove_state(state)
+                num_pruned += 1
+        self.pruned_states += num_pruned
+        return num_pruned
 
 
-    def get_equivalent_rotated_state(self, state):
+    def remove_state(self, state):
         """
-        Method to get a state in the Q values which is rotationally equivalent to the given state.
+        Method to remove a state from the table. Its changes since the last checkpoint are still saved, from the copy
+        of its Q values kept in changed_q_values.
 
         Args:
-            state(str): State to get the rotationa equivalent for.
+            state(str): Canonical state to remove.
+
+        """
+        del self.q_values[state]
+        self.visits.pop(state, None)
+        self.updated_q_values.pop(state, None)
+        self.update_counts.pop(state, None)
+
+
+    def table_stats(self):
+        """
+        Method to get the size and the eviction counters of the table.
 
         Returns:
-            (equivalent_state, rotation_amount): The equivalent state and the number of clockwise rotations to find the
-                equivalent action.
+            (stats): Dictionary with the number of states, the maximum number of states, the number of evictions and
+                the number of evicted and pruned states.
 
         """
-        if state in self.q_values:
-            return (state, 0)
+        return {
+            "states": len(self.q_values),
+            "max_states": self.max_states,
+            "evictions": self.evictions,
+            "evicted_states": self.evicted_states,
+            "pruned_states": self.pruned_states,
+        }
 
-        state_r1 = get_rotated_state(state, self.board_size)
-        if state_r1 in self.q_values:
-            return (state_r1, 3)
 
-        state_r2 = get_rotated_state(state_r1, self.board_size)
-        if state_r2 in self.q_values:
-            return (state_r2, 2)
+    def get_canonical_state(self, state):
+        """
+        Method to get the canonical state of a state, remembering it until the end of the game so that learning from
+        the game does not canonicalize its states again.
+
+        Args:
+            state(str): Encoded state of the Go board.
 
-        state_r3 = get_rotated_state(state_r2, self.board_size)
-        if state_r3 in self.q_values:
-            return (state_r3, 1)
+        Returns:
+            (canonical_state, transform): The canonical state and the index of the transform that maps the state to it.
 
-        return (None, 0)
+        """
+        canonical = self.canonical_states.get(state)
+        if canonical is None:
+            canonical = self.canonical_states[state] = self.symmetries.canonicalize(state)
+        return canonical
 
 
     def learn(self, result):
@@ -171,27 +261,57 @@ class QPlayer():
             result(int): Result of the game. 0 -> Draw, 1 -> Black wins, 2 -> White wins.
 
         """
-        reward = 0
+        self.backup(self.state_history, self.get_reward(result, self.piece_type))
+        self.state_history = []
+        self.canonical_states = {}
+
+
+    def get_reward(self, result, piece_type):
+        """
+        Method to get the reward of a game for a player.
+
+        Args:
+            result(int): Result of the game. 0 -> Draw, 1 -> Black wins, 2 -> White wins.
+            piece_type(int): Piece type of the player. 1 -> Black, 2 -> White.
+
+        Returns:
+            (reward): Reward of the game.
+
+        """
         if result == 0:
-            reward = DRAW_REWARD
-        elif result == self.piece_type:
-            reward = WIN_REWARD
-        else:
-            reward = LOSS_REWARD
+            return DRAW_REWARD
+        elif result == piece_type:
+            return WIN_REWARD
+        return LOSS_REWARD
+
+
+    def backup(self, state_history, reward):
+        """
+        Method to update the Q values with the moves of a game, from the last move to the first. The last move gets the
+        reward and every earlier move is pulled towards the discounted maximum Q value seen so far.
+
+        Args:
+            state_history(list): List of (encoded state, action) of the moves of the player in the game.
+            reward(float): Reward of the game for the player.
+
+        """
+        if isinstance(self.q_values, ArrayQValues):
+            self.backup_vectorized(state_history, reward)
+            return
 
-        self.state_history.reverse()
         max_q_value = -1
 
-        for state, action in self.state_history:
+        for state, action in reversed(state_history):
             if action == "PASS":
                 continue
 
-            q_values, equiv_state, h_flipped, v_flipped, num_rot = self.q(state)
-            self.updated_q_values[equiv_state] = q_values
+            q_values, canonical_state, transform = self.q(state)
+            self.updated_q_values[canonical_state] = q_values
+            self.changed_q_values[canonical_state] = q_values
+            self.update_counts[canonical_state] = self.update_counts.get(canonical_state, 0) + 1
 
-            # Rotate action in the same way as equivalent state.
-            num_rot = 4 - num_rot if num_rot > 0 else num_rot
-            e_action = get_equivalent_action(action, self.board_size, h_flipped, v_flipped, num_rot, False)
+            # Move the action to the canonical board in the same way as the state.
+            e_action = self.symmetries.transform_action(action, transform)
 
             if max_q_value < 0:
                 q_values[e_action[0]][e_action[1]] = round(reward, 4)
@@ -204,7 +324,68 @@ class QPlayer():
                     if q_values[i][j] > max_q_value:
                         max_q_value = q_values[i][j]
 
-        self.state_history = []
+
+    def backup_vectorized(self, state_history, reward):
+        """
+        Method to update the Q values of an array table with the moves of a game. The rows of all the moves are
+        gathered and scanned at once, so only the chain of updated values is computed move by move, and the values are
+        scattered back in one assignment. Gives the same Q values as the move by move update. New states are added
+        under max_states as in q.
+
+        Args:
+            state_history(list): List of (encoded state, action) of the moves of the player in the game.
+            reward(float): Reward of the game for the player.
+
+        """
+        state_ids = []
+        cells = []
+        for state, action in reversed(state_history):
+            if action == "PASS":
+                continue
+            canonical_state, transform = self.get_canonical_state(state)
+            self.record_visit(canonical_state)
+            if canonical_state not in self.q_values:
+                # The states of the game gathered so far are kept by the eviction, so their rows stay valid.
+                self.make_room()
+            state_ids.append(self.q_values.state_id(canonical_state))
+            cells.append(self.symmetries.forward[transform][action[0] * self.board_size + action[1]])
+        if not state_ids:
+            return
+
+        table = self.q_values.table
+        if len(set(state_ids)) < len(state_ids):
+            # A repeated state sees its own earlier update, so the moves are applied one at a time.
+            max_q_value = -1
+            for state_id, cell in zip(state_ids, cells):
+                if max_q_value < 0:
+                    table[state_id, cell] = round(reward, 4)
+                else:
+                    table[state_id, cell] = round((1 - self.alpha) * table[state_id, cell] +
+                                                  self.alpha * self.gamma * max_q_value, 4)
+                max_q_value = max(max_q_value, table[state_id].max())
+        else:
+            moves = np.arange(len(state_ids))
+            rows = table[state_ids]
+            old_values = rows[moves, cells].tolist()
+            rows[moves, cells] = -np.inf
+            other_max_values = rows.max(axis=1).tolist()
+
+            new_values = []
+            max_q_value = -1
+            for old_value, other_max_value in zip(old_values, other_max_values):
+                if max_q_value < 0:
+                    value = round(reward, 4)
+                else:
+                    value = round((1 - self.alpha) * old_value + self.alpha * self.gamma * max_q_value, 4)
+                new_values.append(value)
+                max_q_value = max(max_q_value, other_max_value, value)
+            table[state_ids, cells] = new_values
+
+        # The rows are copied, as the table reuses the row of an evicted state and moves every row when it grows.
+        for state_id in state_ids:
+            state = self.q_values.states[state_id]
+            self.updated_q_values[state] = self.changed_q_values[state] = self.q_values[state].copy()
+            self.update_counts[state] = self.update_counts.get(state, 0) + 1
 
 
     def get_agent_action(self, go, piece_type):
@@ -228,40 +409,103 @@ class QPlayer():
 
     def get_max_action(self, go, piece_type):
         """
-        Method to get the action with the maximum Q value for a given state.
+        Method to get the action with the maximum Q value for a given state. The legal placements are found at once as a
+        mask, moved to the canonical board and used to pick the maximum among their Q values, with ties broken at
+        random. The Q values are not modified.
 
         Args:
             go(GO): Instance of the Go board.
             piece_type(int): Type of piece the player agent is playing as. 1('X') or 2('O').
 
         Returns:
-            (action, value): Action with the maximum Q value.
+            (action, value): Action with the maximum Q value. "PASS" with a value of -inf if there is no valid placement.
+
+        """
+        q_values, _, transform = self.q(go.encoded_state)
+
+        forward = self.symmetries.forward[transform]
+        cells = [forward[p] for p in go.bitboard.to_indexes(go.legal_mask(piece_type))]
+        if not cells:
+            return "PASS", float("-inf")
+
+        # A row of 25 values is masked faster as a flat list than as an array.
+        values = q_values.ravel().tolist() if isinstance(q_values, np.ndarray) else sum(q_values, [])
+        max_q = max([values[cell] for cell in cells])
+        max_cells = [cell for cell in cells if values[cell] == max_q]
+        max_cell = max_cells[0]
+        if len(max_cells) > 1:
+            max_cell = random.choice(max_cells)
+
+        return divmod(self.symmetries.backward[transform][max_cell], self.board_size), max_q
 
+
+    def get_batch_actions(self, batch, piece_type):
         """
-        max_actions = ["PASS"]
-        max_q = float("-inf")
+        Method to get the action with the maximum Q value on every board of a batch. The boards are canonicalized at
+        once by packing their 8 transforms, and the legal placements are moved to the canonical boards to mask the Q
+        values. States missing from the table use the default Q value and are not added. The canonical states and
+        actions are kept for learn_batch.
 
-        q_values, _, h_flipped, v_flipped, num_rot = self.q(go.encoded_state)
-        for i in range(go.size):
-            for j in range(go.size):
-                if q_values[i][j] >= max_q:
-                    equiv_action = get_equivalent_action((i, j), self.board_size, h_flipped, v_flipped, num_rot)
-                    if go.valid_place_check(equiv_action[0], equiv_action[1], piece_type, test_check=True):
-                        if q_values[i][j] > max_q:
-                            max_actions = [equiv_action]
-                            max_q = q_values[i][j]
-                        else:
-                            max_actions.append(equiv_action)
+        Args:
+            batch(BatchGO): Batch of Go boards.
+            piece_type(int): Type of piece the player agent is playing as. 1('X') or 2('O').
 
-                    else:
-                        q_values[i][j] = -1.0
+        Returns:
+            (actions): (num_boards,) array of the point to place the agent's piece at on every board, batch.pass_action
+                if no valid placement is possible.
 
+        """
+        if batch.n_move <= 1:
+            self.batch_history = []
+
+        num_points = batch.num_points
+        transformed = batch.board[:, self.batch_permutations]
+        transforms = (transformed @ self.state_powers).argmin(axis=1)
+        canonical_boards = transformed[batch.rows, transforms]
+        text = (canonical_boards + ord("0")).astype(np.uint8).tobytes().decode("ascii")
+        states = [text[k:k + num_points] for k in range(0, len(text), num_points)]
+
+        if isinstance(self.q_values, ArrayQValues):
+            state_ids = np.array([self.q_values.state_ids.get(state, -1) for state in states])
+            q_values = self.q_values.table[state_ids]
+            q_values[state_ids < 0] = self.default_q_value
+        else:
+            default_row = np.full(num_points, self.default_q_value)
+            q_values = np.array([default_row if row is None else np.ravel(row)
+                                 for row in map(self.q_values.get, states)])
+
+        legal = batch.legal_mask(piece_type)
+        permutations = self.batch_permutations[transforms]
+        canonical_legal = legal[batch.rows[:, None], permutations]
+        masked_q_values = np.where(canonical_legal, q_values, -np.inf)
+        ties = canonical_legal & (masked_q_values == masked_q_values.max(axis=1)[:, None])
+        keys = np.random.random(ties.shape)
+        keys[~ties] = -1
+        cells = keys.argmax(axis=1)
+
+        actions = permutations[batch.rows, cells]
+        passes = ~legal.any(axis=1)
+        actions[passes] = batch.pass_action
+        cells[passes] = -1
+        self.batch_history.append((states, cells))
+        return actions
+
+
+    def learn_batch(self, results):
+        """
+        Method to update the Q values with the games of the last batch played with get_batch_actions.
 
-        max_action = max_actions[0]
-        if len(max_actions) > 1:
-            max_action = random.choice(max_actions)
+        Args:
+            results(np.ndarray): (num_boards,) array of the results of the games. 0 -> Draw, 1 -> Black wins,
+                2 -> White wins.
 
-        return max_action, max_q
+        """
+        for k, result in enumerate(results.tolist()):
+            state_history = [(states[k], divmod(int(cells[k]), self.board_size)) for states, cells in self.batch_history
+                             if cells[k] >= 0]
+            self.backup(state_history, self.get_reward(result, self.piece_type))
+            self.canonical_states = {}
+        self.batch_history = []
 
 
 if __name__ == "__main__":
@@ -270,6 +514,7 @@ if __name__ == "__main__":
     go = GO(N)
     go.set_board(piece_type, previous_board, board)
 
-    player = QPlayer(piece_type, Q_TABLE_PATH)
+    q_table_path = Q_TABLE_BINARY_PATH if os.path.exists(Q_TABLE_BINARY_PATH) else Q_TABLE_PATH
+    player = QPlayer(piece_type, q_table_path)
     action = player.get_agent_action(go, piece_type)
     writeOutput(action)
@@ -0,0 +1,552 @@
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+from bisect import bisect_left
+
+import numpy as np
+
+
+MAGIC = b"QTB1"
+VERSION = 2
+HEADER = struct.Struct("<4sIHHIQQ") # Magic, version, board size, value size, flags, number of states, sequence number
+HEADER_V1 = struct.Struct("<4sIHHIQ") # Header of version 1 tables, which have no sequence number
+VALUE_FORMATS = {2: "e", 4: "f"} # Size in bytes of a stored Q value -> struct format (float16 or float32)
+
+FLAG_CANONICAL = 1 # Every state is stored under the canonical state of its symmetry class
+SEQUENCE_KEY = "sequence" # Key of the sequence number in a JSON Q table, which cannot be an encoded state
+
+MERGE_POLICIES = ("last-writer", "average", "visit-weighted")
+EVICTION_FRACTION = 0.1 # Fraction of max_states evicted at once when a table is full, so evictions are rare
+
+
+def encode_state_key(state):
+    """
+    Method to pack an encoded state into an integer by reading it as a base-3 number.
+
+    Args:
+        state(str): Encoded state of the board.
+
+    Returns:
+        (key): Packed state.
+
+    """
+    return int(state, 3)
+
+
+def decode_state_key(key, board_size):
+    """
+    Method to unpack an integer key into an encoded state.
+
+    Args:
+        key(int): Packed state.
+        board_size(int): Size of the Go board.
+
+    Returns:
+        (state): Encoded state of the board.
+
+    """
+    digits = []
+    for _ in range(board_size * board_size):
+        key, digit = divmod(key, 3)
+        digits.append("012"[digit])
+    return "".join(reversed(digits))
+
+
+def write_q_table(path, q_values, board_size=5, value_size=4, flags=0, sequence=0):
+    """
+    Method to write Q values to a compact binary file: a header, the sorted packed state keys as uint64 and the Q
+    values of each state as a row of float32 (or float16). The file is written to a temporary path and renamed, so a
+    reader never sees a partial file.
+
+    Args:
+        path(str): Path of the file.
+        q_values(dict): Encoded state -> board_size x board_size list of Q values.
+        board_size(int): Size of the Go board. Defaults to 5.
+        value_size(int): Bytes per stored Q value, 4 for float32 or 2 for float16. Defaults to 4.
+        flags(int): Flags stored in the header. Defaults to 0.
+        sequence(int): Sequence number of the last checkpoint the table holds, stored in the header. Defaults to 0.
+
+    """
+    if board_size * board_size > 40:
+        raise ValueError("Packed states of a {0}x{0} board do not fit in 64 bits.".format(board_size))
+
+    entries = sorted((encode_state_key(state), values) for state, values in q_values.items())
+    row_format = struct.Struct("<{}{}".format(board_size * board_size, VALUE_FORMATS[value_size]))
+
+    temp_path = path + ".tmp"
+    with open(temp_path, 'wb') as q_table_file:
+        q_table_file.write(HEADER.pack(MAGIC, VERSION, board_size, value_size, flags, len(entries), sequence))
+        q_table_file.write(struct.pack("<{}Q".format(len(entries)), *[key for key, _ in entries]))
+        for _, values in entries:
+            q_table_file.write(row_format.pack(*[value for row in values for value in row]))
+    os.replace(temp_path, path)
+
+
+class CompactQValues():
+    """
+    Read-only memory-mapped view of a binary Q table, used like the dictionary of Q values. Rows that are read or
+    assigned are kept in memory, so they can be updated in place like the rows of the dictionary.
+    """
+
+    def __init__(self, path):
+        """
+        Method to open a binary Q table.
+
+        Args:
+            path(str): Path of the file.
+
+        """
+        with open(path, 'rb') as q_table_file:
+            self.buffer = mmap.mmap(q_table_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self.buffer) < HEADER_V1.size:
+            raise ValueError("{} is not a binary Q table.".format(path))
+        magic, version = HEADER_V1.unpack_from(self.buffer)[:2]
+        header = {1: HEADER_V1, VERSION: HEADER}.get(version)
+        if magic != MAGIC or header is None or len(self.buffer) < header.size:
+            raise ValueError("{} is not a binary Q table.".format(path))
+        fields = header.unpack_from(self.buffer)
+        _, _, self.board_size, self.value_size, self.flags, self.count = fields[:6]
+        self.sequence = fields[6] if version == VERSION else 0
+
+        keys_offset = header.size
+        self.values_offset = keys_offset + 8 * self.count
+        self.row_format = struct.Struct("<{}{}".format(self.board_size * self.board_size,
+                                                       VALUE_FORMATS[self.value_size]))
+        if len(self.buffer) < self.values_offset + self.count * self.row_format.size:
+            raise ValueError("{} is truncated.".format(path))
+
+        keys = memoryview(self.buffer)[keys_offset:self.values_offset]
+        if sys.byteorder == "little":
+            self.state_keys = keys.cast("Q")
+        else:
+            self.state_keys = array("Q", keys.tobytes())
+            self.state_keys.byteswap()
+
+        self.rows = {} # Encoded state -> rows read or assigned so far
+
+    def find(self, state):
+        """
+        Method to find the position of a state in the file.
+
+        Args:
+            state(str): Encoded state of the board.
+
+        Returns:
+            (index): Index of the state in the file, -1 if it is not stored.
+
+        """
+        key = encode_state_key(state)
+        index = bisect_left(self.state_keys, key)
+        if index < self.count and self.state_keys[index] == key:
+            return index
+        return -1
+
+    def read_row(self, index):
+        """
+        Method to read the Q values of a stored state.
+
+        Args:
+            index(int): Index of the state in the file.
+
+        Returns:
+            (q_values): board_size x board_size list of Q values.
+
+        """
+        values = self.row_format.unpack_from(self.buffer, self.values_offset + index * self.row_format.size)
+        size = self.board_size
+        return [list(values[i * size:(i + 1) * size]) for i in range(size)]
+
+    def __contains__(self, state):
+        return state in self.rows or self.find(state) >= 0
+
+    def __getitem__(self, state):
+        row = self.rows.get(state)
+        if row is None:
+            index = self.find(state)
+            if index < 0:
+                raise KeyError(state)
+            row = self.rows[state] = self.read_row(index)
+        return row
+
+    def __setitem__(self, state, q_values):
+        self.rows[state] = q_values
+
+    def get(self, state, default=None):
+        return self[state] if state in self else default
+
+    def keys(self):
+        """
+        Method to get all the states, stored or assigned.
+
+        Returns:
+            (states): List of encoded states.
+
+        """
+        stored = [decode_state_key(key, self.board_size) for key in self.state_keys]
+        states = [state for state in stored if state not in self.rows]
+        return states + list(self.rows)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def items(self):
+        return [(state, self[state]) for state in self.keys()]
+
+
+class ArrayQValues():
+    """
+    Q table stored as a 2-D NumPy array with one row of board_size * board_size Q values per state id, used like the
+    dictionary of Q values. The Q values of a state are returned as a board_size x board_size view of its row, so they
+    can be updated in place like the rows of the dictionary. Views stay valid until the next new state is added.
+    """
+
+    def __init__(self, board_size=5, default_q_value=0.5, capacity=1024):
+        """
+        Method to initialize an empty table.
+
+        Args:
+            board_size(int): Size of the Go board. Defaults to 5.
+            default_q_value(float): Q value of every action of a new state. Defaults to 0.5.
+            capacity(int): Number of rows allocated up front. Defaults to 1024.
+
+        """
+        self.board_size = board_size
+        self.default_q_value = default_q_value
+        self.state_ids = {} # Encoded state -> row of the state in the table
+        self.states = [] # Row -> encoded state, None for a free row
+        self.free_ids = [] # Rows of deleted states, reused by new states
+        self.table = np.full((capacity, board_size * board_size), default_q_value)
+
+    @classmethod
+    def from_q_values(cls, q_values, board_size=5, default_q_value=0.5):
+        """
+        Method to copy Q values into a new table.
+
+        Args:
+            q_values(dict): Dictionary (or dictionary-like view) of encoded state -> Q values.
+            board_size(int): Size of the Go board. Defaults to 5.
+            default_q_value(float): Q value of every action of a new state. Defaults to 0.5.
+
+        Returns:
+            (array_q_values): Table holding the Q values.
+
+        """
+        array_q_values = cls(board_size, default_q_value, max(1024, len(q_values)))
+        for state, values in q_values.items():
+            array_q_values[state] = values
+        return array_q_values
+
+    def state_id(self, state):
+        """
+        Method to get the row of a state, adding a row of default Q values if the state is new.
+
+        Args:
+            state(str): Encoded state of the board.
+
+        Returns:
+            (state_id): Row of the state in the table.
+
+        """
+        state_id = self.state_ids.get(state)
+        if state_id is None and self.free_ids:
+            state_id = self.state_ids[state] = self.free_ids.pop()
+            self.states[state_id] = state
+            self.table[state_id] = self.default_q_value
+        elif state_id is None:
+            state_id = self.state_ids[state] = len(self.states)
+            self.states.append(state)
+            if state_id == len(self.table):
+                grown = np.full((2 * len(self.table), self.table.shape[1]), self.default_q_value)
+                grown[:state_id] = self.table
+                self.table = grown
+        return state_id
+
+    def __contains__(self, state):
+        return state in self.state_ids
+
+    def __getitem__(self, state):
+        return self.table[self.state_ids[state]].reshape(self.board_size, self.board_size)
+
+    def __setitem__(self, state, q_values):
+        state_id = self.state_id(state)
+        self.table[state_id] = np.ravel(q_values)
+
+    def __delitem__(self, state):
+        state_id = self.state_ids.pop(state)
+        self.states[state_id] = None
+        self.free_ids.append(state_id)
+
+    def get(self, state, default=None):
+        return self[state] if state in self.state_ids else default
+
+    def keys(self):
+        return list(self.state_ids)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.state_ids)
+
+    def items(self):
+        return [(state, self[state]) for state in self.state_ids]
+
+    def get_default_states(self):
+        """
+        Method to get the states whose Q values all still equal the default Q value.
+
+        Returns:
+            (states): List of encoded states.
+
+        """
+        is_default = (self.table[:len(self.states)] == self.default_q_value).all(axis=1)
+        return [self.states[state_id] for state_id in np.flatnonzero(is_default) if self.states[state_id] is not None]
+
+
+class SharedQValues():
+    """
+    Q table shared by several learners, used like the dictionary of Q values. Learners keep their own tables and merge
+    the Q values they changed into this one with a merge policy: "last-writer" keeps the latest Q values, "average"
+    averages them with the stored ones and "visit-weighted" weighs both by the number of merges behind them. States are
+    split into shards by their packed key, each with its own lock, so writers of different states do not wait on each
+    other. With max_states, the states with the fewest merges are evicted when a new state is merged into a full table.
+    """
+
+    def __init__(self, merge_policy="last-writer", num_shards=16, max_states=None):
+        """
+        Method to initialize an empty table.
+
+        Args:
+            merge_policy(str): How merged Q values are combined with the stored ones, one of "last-writer", "average"
+                and "visit-weighted". Defaults to "last-writer".
+            num_shards(int): Number of shards. Defaults to 16.
+            max_states(int): Maximum number of states in the table, None for no limit. Writers merging new states at
+                the same time can each add one state over it. Defaults to None.
+
+        """
+        if merge_policy not in MERGE_POLICIES:
+            raise ValueError("Unknown merge policy {}.".format(merge_policy))
+        self.merge_policy = merge_policy
+        self.max_states = max_states
+        self.evictions = 0
+        self.evicted_states = 0
+        self.shards = [{} for _ in range(num_shards)] # Encoded state -> Q values
+        self.visits = [{} for _ in range(num_shards)] # Encoded state -> number of merges behind the Q values
+        self.locks = [threading.Lock() for _ in range(num_shards)]
+        self.changed_q_values = {} # States merged since the last checkpoint -> Q values
+        self.changed_lock = threading.Lock()
+
+    @classmethod
+    def from_q_values(cls, q_values, merge_policy="last-writer", num_shards=16, max_states=None):
+        """
+        Method to copy Q values into a new table. Every copied state counts as one visit. A table over max_states is
+        cut down by an eviction.
+
+        Args:
+            q_values(dict): Dictionary (or dictionary-like view) of encoded state -> Q values.
+            merge_policy(str): Merge policy of the table. Defaults to "last-writer".
+            num_shards(int): Number of shards. Defaults to 16.
+            max_states(int): Maximum number of states in the table, None for no limit. Defaults to None.
+
+        Returns:
+            (shared_q_values): Table holding the Q values.
+
+        """
+        shared_q_values = cls(merge_policy, num_shards, max_states)
+        for state, values in q_values.items():
+            shard = shared_q_values.get_shard(state)
+            shared_q_values.shards[shard][state] = [list(row) for row in values]
+            shared_q_values.visits[shard][state] = 1
+        if max_states is not None and len(shared_q_values) > max_states:
+            shared_q_values.evict_states()
+        return shared_q_values
+
+    def get_shard(self, state):
+        """
+        Method to get the shard of a state.
+
+        Args:
+            state(str): Encoded state of the board.
+
+        Returns:
+            (shard): Index of the shard.
+
+        """
+        return encode_state_key(state) % len(self.shards)
+
+    def merge(self, state, q_values, visits=1):
+        """
+        Method to merge the Q values a learner found for a state into the table.
+
+        Args:
+            state(str): Encoded state of the board.
+            q_values(list): Q values of the learner for the state.
+            visits(int): Number of updates behind the Q values of the learner. Defaults to 1.
+
+        """
+        shard = self.get_shard(state)
+        if self.max_states is not None and state not in self.shards[shard] and len(self) >= self.max_states:
+            self.evict_states()
+        with self.locks[shard]:
+            stored = self.shards[shard].get(state)
+            stored_visits = self.visits[shard].get(state, 0)
+            if stored is None or self.merge_policy == "last-writer":
+                merged = [list(row) for row in q_values]
+            elif self.merge_policy == "average":
+                merged = [[(old + new) / 2 for old, new in zip(old_row, new_row)]
+                          for old_row, new_row in zip(stored, q_values)]
+            else:
+                total = stored_visits + visits
+                merged = [[(old * stored_visits + new * visits) / total for old, new in zip(old_row, new_row)]
+                          for old_row, new_row in zip(stored, q_values)]
+            self.shards[shard][state] = merged
+            self.visits[shard][state] = stored_visits + visits
+
+        with self.changed_lock:
+            self.changed_q_values[state] = merged
+
+    def evict_states(self):
+        """
+        Method to make room in a full table by evicting the states with the fewest merges. The merge counts are halved
+        after every eviction, so states that were merged often long ago can be evicted later. Every shard is locked
+        while the states are chosen and removed.
+        """
+        target = int(self.max_states * (1 - EVICTION_FRACTION))
+        for lock in self.locks:
+            lock.acquire()
+        try:
+            candidates = [(visits, shard, state) for shard, shard_visits in enumerate(self.visits)
+                          for state, visits in shard_visits.items()]
+            candidates.sort(key=lambda candidate: candidate[0])
+            evicted = candidates[:max(0, len(candidates) - target)]
+            for _, shard, state in evicted:
+                del self.shards[shard][state]
+                del self.visits[shard][state]
+            for shard_visits in self.visits:
+                for state in shard_visits:
+                    shard_visits[state] //= 2
+        finally:
+            for lock in self.locks:
+                lock.release()
+
+        self.evictions += 1
+        self.evicted_states += len(evicted)
+
+    def merge_q_values(self, q_values, visits=None):
+        """
+        Method to merge the Q values a learner changed into the table.
+
+        Args:
+            q_values(dict): Encoded state -> Q values of the learner.
+            visits(dict): Encoded state -> number of updates behind the Q values. Defaults to None (one per state).
+
+        """
+        for state, values in q_values.items():
+            self.merge(state, values, 1 if visits is None else visits.get(state, 1))
+
+    def __contains__(self, state):
+        return state in self.shards[self.get_shard(state)]
+
+    def __getitem__(self, state):
+        return self.shards[self.get_shard(state)][state]
+
+    def __setitem__(self, state, q_values):
+        shard = self.get_shard(state)
+        with self.locks[shard]:
+            self.shards[shard][state] = q_values
+            self.visits[shard].setdefault(state, 0)
+
+    def get(self, state, default=None):
+        return self.shards[self.get_shard(state)].get(state, default)
+
+    def keys(self):
+        return [state for shard in self.shards for state in list(shard)]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return sum(len(shard) for shard in self.shards)
+
+    def items(self):
+        return [item for shard in self.shards for item in list(shard.items())]
+
+
+def load_q_values(path, with_sequence=False):
+    """
+    Method to load Q values from a JSON or a binary Q table. Binary tables are memory-mapped instead of parsed. A missing
+    or empty file gives an empty table.
+
+    Args:
+        path(str): Path of the file.
+        with_sequence(bool): Whether to also return the sequence number stored in the table. Defaults to False.
+
+    Returns:
+        (q_values): Dictionary (or dictionary-like view) of encoded state -> Q values, and the sequence number of the
+            last checkpoint the table holds if with_sequence is set (0 for a table written outside of checkpoints).
+
+    """
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        q_values, sequence = {}, 0
+    else:
+        with open(path, 'rb') as q_table_file:
+            is_binary = q_table_file.read(len(MAGIC)) == MAGIC
+        if is_binary:
+            q_values = CompactQValues(path)
+            sequence = q_values.sequence
+        else:
+            with open(path, 'r') as q_values_file:
+                q_values = json.load(q_values_file)
+            sequence = q_values.pop(SEQUENCE_KEY, 0)
+    return (q_values, sequence) if with_sequence else q_values
+
+
+def dump_q_values(path, q_values, board_size=5, flags=0, sequence=0):
+    """
+    Method to save Q values, as JSON if the path ends with ".json" and as a binary Q table otherwise. Both are written to
+    a temporary path and renamed.
+
+    Args:
+        path(str): Path of the file.
+        q_values(dict): Dictionary (or dictionary-like view) of encoded state -> Q values.
+        board_size(int): Size of the Go board. Defaults to 5.
+        flags(int): Flags stored in the header of a binary Q table. Defaults to 0.
+        sequence(int): Sequence number of the last checkpoint the table holds, stored in the header of a binary Q table
+            and under SEQUENCE_KEY in a JSON one. Defaults to 0, which is not stored in JSON.
+
+    """
+    if path.endswith(".json"):
+        q_values = dict(q_values.items())
+        if sequence:
+            q_values[SEQUENCE_KEY] = sequence
+        temp_path = path + ".tmp"
+        with open(temp_path, 'w') as q_values_file:
+            json.dump(q_values, q_values_file, default=np.ndarray.tolist)
+        os.replace(temp_path, path)
+    else:
+        write_q_table(path, q_values, board_size, flags=flags, sequence=sequence)
+
+
+if __name__ == "__main__":
+    import argparse
+    from symmetry import canonicalize_q_values
+
+    parser = argparse.ArgumentParser(description="Convert a JSON Q table into a binary Q table.")
+    parser.add_argument("json_path", help="path of the JSON Q table")
+    parser.add_argument("binary_path", help="path of the binary Q table to write")
+    parser.add_argument("--board-size", "-n", type=int, help="size of the Go board", default=5)
+    parser.add_argument("--half", action="store_true", help="store the Q values as float16 instead of float32")
+    args = parser.parse_args()
+
+    q_values = canonicalize_q_values(load_q_values(args.json_path), args.board_size)
+    write_q_table(args.binary_path, q_values, args.board_size, 2 if args.half else 4, FLAG_CANONICAL)
+    print("Converted {} canonical states: {} -> {} bytes.".format(len(q_values), os.path.getsize(args.json_path),
+                                                                  os.path.getsize(args.binary_path)))
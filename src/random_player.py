@@ -2,7 +2,7 @@ import random
 from read import readInput
 from write import writeOutput
 
-from host import GO
+from go_board import GO
 
 class RandomPlayer():
     """
@@ -28,17 +28,35 @@ class RandomPlayer():
                 placement is possible.
 
         """
-        possible_placements = []
-        for i in range(go.size):
-            for j in range(go.size):
-                if go.valid_place_check(i, j, piece_type, test_check = True):
-                    possible_placements.append((i,j))
+        possible_placements = go.legal_moves(piece_type)
 
         if not possible_placements:
             return "PASS"
         else:
             return random.choice(possible_placements)
 
+    def get_batch_actions(self, batch, piece_type):
+        """
+        Method to get a random valid action on every board of a batch.
+
+        Args:
+            batch(BatchGO): Batch of Go boards.
+            piece_type(int): Type of piece the player agent is playing as. 1('X') or 2('O').
+
+        Returns:
+            (actions): (num_boards,) array of the point to place the agent's piece at on every board, batch.pass_action
+                if no valid placement is possible.
+
+        """
+        import numpy as np # Only batched play needs NumPy, so the per move script does not load it
+
+        legal = batch.legal_mask(piece_type)
+        keys = np.random.random(legal.shape)
+        keys[~legal] = -1
+        actions = keys.argmax(axis=1)
+        actions[~legal.any(axis=1)] = batch.pass_action
+        return actions
+
 if __name__ == "__main__":
     N = 5
     piece_type, previous_board, board = readInput(N)
@@ -0,0 +1,100 @@
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+STARTUP_THRESHOLD = 0.1 # Seconds a cold my_player3.py process may take to play the first move of a game
+EMPTY_INPUT = "1\n" + "\n".join(["0" * 5] * 10) # input.txt of the first move of 'X'
+
+# Run in a fresh interpreter to time the stages of a cold start the way my_player3.py goes through them when the
+# engine daemon is not running.
+STAGES_CODE = """
+import json, sys, time
+start = time.perf_counter()
+from engine_client import request_action
+from read import readInput
+from write import writeOutput
+imports = time.perf_counter()
+piece_type, previous_board, board = readInput(5)
+parse = time.perf_counter()
+from engine import Engine
+engine_import = time.perf_counter()
+action, _ = Engine(5).get_action(piece_type, previous_board, board, 1, "ALPHA_BETA", 1.0)
+first_move = time.perf_counter()
+print(json.dumps({"imports": imports - start, "input parse": parse - imports, "engine import": engine_import - parse,
+                  "first move": first_move - engine_import}))
+"""
+
+
+def run_python(args, work_dir):
+    """
+    Method to run a Python process from a working directory, with the source directory on the path.
+
+    Args:
+        args(list): Arguments of the Python interpreter.
+        work_dir(str): Working directory of the process, holding input.txt and turn_number.txt.
+
+    Returns:
+        (elapsed, output): Wall time of the process in seconds and its standard output.
+
+    """
+    env = dict(os.environ, PYTHONPATH=SCRIPT_DIR)
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable] + args, cwd=work_dir, env=env, stdout=subprocess.PIPE, check=True,
+                            universal_newlines=True)
+    return time.perf_counter() - start, result.stdout
+
+
+def measure_startup(work_dir):
+    """
+    Method to measure one cold start of the per move protocol.
+
+    Args:
+        work_dir(str): Working directory of the processes.
+
+    Returns:
+        (times): Dictionary of stage -> seconds, with the interpreter start, the stages of my_player3.py and the wall
+            time of a whole my_player3.py process.
+
+    """
+    with open(os.path.join(work_dir, "input.txt"), "w") as input_file:
+        input_file.write(EMPTY_INPUT)
+    with open(os.path.join(work_dir, "turn_number.txt"), "w") as turn_file:
+        turn_file.write("1")
+
+    times = {"interpreter": run_python(["-c", "pass"], work_dir)[0]}
+    times.update(json.loads(run_python(["-c", STAGES_CODE], work_dir)[1]))
+    times["my_player3.py"] = run_python([os.path.join(SCRIPT_DIR, "my_player3.py")], work_dir)[0]
+    return times
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the cold start of my_player3.py for the first move.")
+    parser.add_argument("--runs", "-r", type=int, help="number of runs, the median is reported", default=5)
+    parser.add_argument("--threshold", "-t", type=float, help="max seconds of a my_player3.py process",
+                        default=STARTUP_THRESHOLD)
+    args = parser.parse_args()
+
+    if sys.dont_write_bytecode:
+        print("Bytecode caching is off (PYTHONDONTWRITEBYTECODE), every run compiles the modules again.")
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        runs = [measure_startup(work_dir) for _ in range(args.runs)]
+    finally:
+        shutil.rmtree(work_dir)
+
+    medians = {stage: sorted(run[stage] for run in runs)[len(runs) // 2] for stage in runs[0]}
+    for stage, seconds in medians.items():
+        print("{}: {:.1f}ms".format(stage, seconds * 1000))
+
+    if medians["my_player3.py"] > args.threshold:
+        print("Regression: my_player3.py took {:.1f}ms, over the threshold of {:.1f}ms.".format(
+            medians["my_player3.py"] * 1000, args.threshold * 1000))
+        sys.exit(1)
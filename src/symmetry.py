@@ -0,0 +1,190 @@
+from operator import itemgetter
+
+
+NUM_TRANSFORMS = 8 # Rotations of the board by 0, 1, 2 and 3 quarter turns clockwise, without and with a flip first
+
+
+class Symmetries():
+    """
+    Precomputed index permutations of the 8 symmetries (dihedral group D4) of an n*n board. Transform t horizontally
+    flips the board if t >= 4 and then rotates it clockwise t % 4 times.
+    """
+
+    def __init__(self, n):
+        """
+        Method to precompute the permutations for a board size.
+
+        Args:
+            n(int): Size of the board.
+
+        """
+        self.size = n
+        num_points = n * n
+
+        # forward[t][p] is the point that point p moves to, backward[t] is the inverse permutation.
+        self.forward = []
+        self.backward = []
+        for t in range(NUM_TRANSFORMS):
+            forward = []
+            for p in range(num_points):
+                i, j = divmod(p, n)
+                if t >= 4:
+                    j = n - j - 1
+                for _ in range(t % 4):
+                    i, j = j, n - i - 1
+                forward.append(i * n + j)
+            backward = [0] * num_points
+            for p, q in enumerate(forward):
+                backward[q] = p
+            self.forward.append(forward)
+            self.backward.append(backward)
+
+        # Picks the characters of a state in the order of the transformed state.
+        self.state_getters = [itemgetter(*backward) for backward in self.backward]
+        # Picks the characters of all the transformed states at once, one after the other.
+        self.all_states_getter = itemgetter(*[p for backward in self.backward for p in backward])
+
+        # Actions as (row, column) before and after each transform, so mapping an action is a dictionary lookup.
+        points = [divmod(p, n) for p in range(num_points)]
+        self.action_maps = [{points[p]: points[q] for p, q in enumerate(forward)} for forward in self.forward]
+        self.inverse_action_maps = [{points[q]: points[p] for p, q in enumerate(forward)} for forward in self.forward]
+
+        # compositions[a][b] is the transform equal to applying transform a and then transform b.
+        transforms = {tuple(forward): t for t, forward in enumerate(self.forward)}
+        self.compositions = [[transforms[tuple(self.forward[b][q] for q in self.forward[a])]
+                              for b in range(NUM_TRANSFORMS)] for a in range(NUM_TRANSFORMS)]
+
+    def transform_state(self, state, t):
+        """
+        Method to apply a symmetry to an encoded state.
+
+        Args:
+            state(str): Encoded state of the board.
+            t(int): Index of the transform.
+
+        Returns:
+            (transformed_state): Encoded state of the transformed board.
+
+        """
+        return "".join(self.state_getters[t](state))
+
+    def transform_states(self, state):
+        """
+        Method to apply all the symmetries to an encoded state at once.
+
+        Args:
+            state(str): Encoded state of the board.
+
+        Returns:
+            (transformed_states): List of the encoded states of the 8 transformed boards, in transform order.
+
+        """
+        num_points = self.size * self.size
+        states = "".join(self.all_states_getter(state))
+        return [states[k:k + num_points] for k in range(0, NUM_TRANSFORMS * num_points, num_points)]
+
+    def canonicalize(self, state):
+        """
+        Method to get the canonical representative of the symmetry class of a state, which is the smallest of its 8
+        transformed states. A state that already is canonical gets the identity transform.
+
+        Args:
+            state(str): Encoded state of the board.
+
+        Returns:
+            (canonical_state, t): The canonical state and the index of the transform that maps the state to it.
+
+        """
+        states = self.transform_states(state)
+        canonical_state = min(states)
+        return canonical_state, states.index(canonical_state)
+
+    def transform_action(self, action, t):
+        """
+        Method to map an action on a board to the same action on the transformed board.
+
+        Args:
+            action(tuple): (row, column) of the action.
+            t(int): Index of the transform.
+
+        Returns:
+            (transformed_action): (row, column) of the action on the transformed board.
+
+        """
+        return self.action_maps[t][action]
+
+    def restore_action(self, action, t):
+        """
+        Method to map an action on a transformed board back to the original board.
+
+        Args:
+            action(tuple): (row, column) of the action on the transformed board.
+            t(int): Index of the transform.
+
+        Returns:
+            (original_action): (row, column) of the action on the original board.
+
+        """
+        return self.inverse_action_maps[t][action]
+
+    def transform_q_values(self, q_values, t):
+        """
+        Method to move a board_size x board_size grid of Q values to the transformed board.
+
+        Args:
+            q_values(list): Q values of every action on the board.
+            t(int): Index of the transform.
+
+        Returns:
+            (transformed_q_values): Q values of every action on the transformed board.
+
+        """
+        n = self.size
+        flat = [value for row in q_values for value in row]
+        flat = [flat[p] for p in self.backward[t]]
+        return [flat[i * n:(i + 1) * n] for i in range(n)]
+
+
+_symmetries = {}
+
+
+def get_symmetries(n):
+    """
+    Method to get the shared symmetry tables for a board size.
+
+    Args:
+        n(int): Size of the board.
+
+    Returns:
+        (symmetries): Symmetries instance for the size.
+
+    """
+    symmetries = _symmetries.get(n)
+    if symmetries is None:
+        symmetries = _symmetries[n] = Symmetries(n)
+    return symmetries
+
+
+def canonicalize_q_values(q_values, board_size=5):
+    """
+    Method to store every state of a Q table under the canonical state of its symmetry class, with its Q values moved
+    to the canonical board. When a class has several entries, the entry that already is canonical is kept, otherwise
+    the first one.
+
+    Args:
+        q_values(dict): Dictionary (or dictionary-like view) of encoded state -> Q values.
+        board_size(int): Size of the Go board. Defaults to 5.
+
+    Returns:
+        (canonical_q_values): Dictionary of canonical state -> Q values.
+
+    """
+    symmetries = get_symmetries(board_size)
+    canonical_q_values = {}
+    for state, values in q_values.items():
+        canonical_state, t = symmetries.canonicalize(state)
+        if t == 0:
+            canonical_q_values[canonical_state] = values
+        elif canonical_state not in canonical_q_values and canonical_state not in q_values:
+            canonical_q_values[canonical_state] = symmetries.transform_q_values(values, t)
+    return canonical_q_values
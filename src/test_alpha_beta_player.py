@@ -0,0 +1,41 @@
+from alpha_beta_player import AlphaBetaPlayer
+from parallel_search import get_sample_positions
+
+
+def test_search_both_piece_types_with_one_player():
+    # The position after the first search is searched again for the other piece type: its stored entries were made
+    # while it was a min node, and they have to give the values a fresh player finds.
+    for go, piece_type in get_sample_positions(10, seed=1):
+        player = AlphaBetaPlayer()
+        action = player.get_agent_action(go, piece_type, 3)
+        if action == "PASS":
+            continue
+        go.make_move(action[0], action[1], piece_type)
+
+        fresh_player = AlphaBetaPlayer()
+        for searching_player in (player, fresh_player):
+            searching_player.prepare_search(go)
+        _, value = player.search_root(go, 3 - piece_type, 2)
+        _, fresh_value = fresh_player.search_root(go, 3 - piece_type, 2)
+        assert value == fresh_value
+
+
+def test_pondering_ages_the_table_once_per_move():
+    go, piece_type = get_sample_positions(1, seed=2)[0]
+    player = AlphaBetaPlayer()
+    action = player.get_agent_action(go, piece_type, 3)
+    generation = player.transposition_table.generation
+    go.make_move(action[0], action[1], piece_type)
+
+    # The pondering plays the predicted reply of the opponent and searches from there.
+    player.ponder(go, piece_type, 3)
+    reply = player.ponder_action
+    assert go.undo_stack[-1][:3] == (reply[0], reply[1], 3 - piece_type)
+    player.get_agent_action(go, piece_type, 2)
+    assert player.transposition_table.generation == generation + 1
+
+
+def test_search_without_prepare_search():
+    go, piece_type = get_sample_positions(1, seed=4)[0]
+    action, _ = AlphaBetaPlayer().search_root(go, piece_type, 3)
+    assert go.valid_place_check(action[0], action[1], piece_type, test_check=True)
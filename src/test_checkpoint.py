@@ -0,0 +1,37 @@
+import os
+
+from checkpoint import Checkpointer, get_backup_path, get_delta_paths, load_checkpoint
+from q_table_store import FLAG_CANONICAL, dump_q_values
+
+
+STATE = "0" * 25
+
+
+def get_q_values(value):
+    return {STATE: [[value] * 5 for _ in range(5)]}
+
+
+def test_crash_during_full_checkpoint_keeps_updates(tmp_path):
+    path = os.path.join(str(tmp_path), "q_values.json")
+    checkpointer = Checkpointer(path, interval_games=None, full_interval=100)
+    checkpointer.save(get_q_values(0.25), {}, full=True)
+    checkpointer.wait()
+    checkpointer.save({}, get_q_values(0.5))
+    checkpointer.close()
+    assert load_checkpoint(path)[STATE][0][0] == 0.5
+
+    # The next full checkpoint stops after setting the table aside: the previous table and its delta are loaded.
+    new_path = os.path.join(str(tmp_path), "q_values.full.json")
+    dump_q_values(new_path, get_q_values(0.75), flags=FLAG_CANONICAL, sequence=checkpointer.sequence + 1)
+    os.replace(path, get_backup_path(path))
+    assert load_checkpoint(path)[STATE][0][0] == 0.5
+
+    # It stops after renaming the new table: the delta left behind has a lower sequence number and is skipped, even
+    # with a file time that does not tell it is older.
+    os.replace(new_path, path)
+    delta_time = os.stat(path).st_mtime_ns + 10 ** 9
+    os.utime(get_delta_paths(path)[0][1], ns=(delta_time, delta_time))
+    assert load_checkpoint(path)[STATE][0][0] == 0.75
+    checkpointer = Checkpointer(path, interval_games=None)
+    assert checkpointer.sequence == 3
+    checkpointer.close()
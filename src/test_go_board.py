@@ -0,0 +1,57 @@
+import random
+
+from go_board import GO
+
+
+def new_go(superko=False):
+    go = GO(5)
+    go.init_board(5)
+    go.superko = superko
+    return go
+
+
+def test_superko_forbids_non_capturing_repeat():
+    go = new_go(superko=True)
+    go.make_move(2, 2, 1)
+    repeated_hash = go.zobrist_hash
+    go.unmake_move()
+    # The board with a stone in the center was seen earlier in the game. Placing it again captures nothing and the
+    # point has empty neighbors.
+    go.position_history.append(repeated_hash)
+
+    assert not go.valid_place_check(2, 2, 1, test_check=True)
+    assert (2, 2) not in go.legal_moves(1)
+    assert not go.legal_mask(1) & go.bitboard.point_masks[2 * 5 + 2]
+    assert go.valid_place_check(2, 2, 2, test_check=True)
+
+
+def test_superko_playouts_never_repeat_a_board():
+    rng = random.Random(0)
+    for _ in range(50):
+        go = new_go(superko=True)
+        seen = {go.zobrist_hash}
+        piece_type = 1
+        for _ in range(80):
+            moves = go.legal_moves(piece_type)
+            if not moves:
+                break
+            assert go.legal_mask(piece_type) == sum(go.bitboard.point_masks[i * 5 + j] for i, j in moves)
+            move = rng.choice(moves)
+            assert go.make_move(move[0], move[1], piece_type)
+            assert go.zobrist_hash not in seen
+            seen.add(go.zobrist_hash)
+            piece_type = 3 - piece_type
+
+
+def test_find_liberty_of_empty_points():
+    go = new_go()
+    go.board = [[0, 1, 0, 0, 0],
+                [1, 0, 0, 2, 0],
+                [0, 0, 2, 0, 2],
+                [0, 0, 0, 2, 0],
+                [0, 0, 0, 0, 0]]
+    # As in the original implementation, a lone empty point has no liberty and a larger empty region has one.
+    assert not go.find_liberty(0, 0)
+    assert not go.find_liberty(2, 3)
+    assert go.find_liberty(0, 2)
+    assert go.find_liberty(4, 4)
@@ -0,0 +1,13 @@
+from parallel_search import ParallelAlphaBetaPlayer, get_sample_positions
+from transposition_table import EXACT
+
+
+def test_root_result_is_stored_under_the_root_key():
+    go, piece_type = get_sample_positions(1, seed=3)[0]
+    player = ParallelAlphaBetaPlayer(2)
+    try:
+        player.prepare_search(go)
+        action, value = player.search_root(go, piece_type, 3)
+    finally:
+        player.close()
+    assert player.transposition_table.probe(go.search_key(piece_type)) == (3, value, EXACT, action)
@@ -0,0 +1,74 @@
+import os
+
+import numpy as np
+
+from batch_go import play_batch
+from checkpoint import Checkpointer, get_delta_path
+from q_player import QPlayer
+from q_table_store import SharedQValues, load_q_values
+from random_player import RandomPlayer
+from trainer import merge_learners, self_play
+
+
+def test_learn_batch_keeps_table_under_max_states(tmp_path):
+    player = QPlayer(1, os.path.join(str(tmp_path), "q_values.json"), batch_learning=True, max_states=50)
+    for _ in range(3):
+        player.learn_batch(play_batch(20, player, RandomPlayer()))
+        assert len(player.q_values) <= 50
+    assert player.evictions > 0
+
+
+def test_self_play_keeps_table_under_max_states(tmp_path):
+    q_table_path = os.path.join(str(tmp_path), "q_values.json")
+    self_play(q_table_path, num_games=20, num_workers=1, games_per_task=5, snapshot_interval=10, max_states=50)
+    assert len(QPlayer(1, q_table_path).q_values) <= 50
+
+
+def test_shared_table_keeps_under_max_states(tmp_path):
+    learner = QPlayer(1, os.path.join(str(tmp_path), "q_values.json"), batch_learning=True)
+    learner.learn_batch(play_batch(20, learner, RandomPlayer()))
+    shared_q_values = SharedQValues(max_states=50)
+    shared_q_values.merge_q_values(learner.changed_q_values)
+    assert len(learner.changed_q_values) > 50
+    assert len(shared_q_values) <= 50
+    assert len(SharedQValues.from_q_values(learner.q_values, max_states=50)) <= 50
+
+
+def test_checkpoint_delta_after_evictions(tmp_path):
+    q_table_path = os.path.join(str(tmp_path), "q_values.json")
+    player = QPlayer(1, q_table_path, batch_learning=True, max_states=50)
+    learned_q_values = {}
+    for _ in range(3):
+        player.learn_batch(play_batch(20, player, RandomPlayer()))
+        learned_q_values.update({state: np.array(values) for state, values in player.changed_q_values.items()})
+        # The table reuses the rows of evicted states, the changed Q values must not follow them.
+        for state, values in player.changed_q_values.items():
+            assert not np.shares_memory(values, player.q_values.table)
+    assert player.evictions > 0
+
+    checkpointer = Checkpointer(q_table_path, interval_games=None, full_interval=100)
+    checkpointer.save({}, {}, full=True)
+    checkpointer.wait()
+    checkpointer.save(player.q_values, player.changed_q_values)
+    checkpointer.close()
+    # The full checkpoint took the first sequence number.
+    delta = load_q_values(get_delta_path(q_table_path, 2))
+    assert len(delta) > 50
+    for state, values in delta.items():
+        assert np.allclose(np.ravel(values), np.ravel(learned_q_values[state]))
+
+
+def test_merge_learners_weighs_by_updates(tmp_path):
+    q_table_path = os.path.join(str(tmp_path), "q_values.json")
+    state = "0" * 25
+    winner = QPlayer(1, q_table_path)
+    loser = QPlayer(2, q_table_path)
+    for _ in range(3):
+        winner.backup([(state, (2, 2))], 1)
+    loser.backup([(state, (2, 2))], 0)
+
+    shared_q_values = SharedQValues("visit-weighted")
+    merge_learners(shared_q_values, winner, loser)
+    # Three updates of the winner against one of the loser.
+    assert shared_q_values[state][2][2] == 0.75
+    assert not winner.update_counts and not loser.update_counts
@@ -1,16 +1,62 @@
-import json
+import argparse
+import os
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from copy import deepcopy
 from random import Random
 from host import GO
 from alpha_beta_player import AlphaBetaPlayer
 from random_player import RandomPlayer
 from q_player import QPlayer
+from checkpoint import Checkpointer, get_last_sequence, load_checkpoint
+from q_table_store import FLAG_CANONICAL, MERGE_POLICIES, SharedQValues, dump_q_values
 
 
 Q_TABLE_PATH = "q_values.json"
 
 
-def train(go, player1, player2, q_table_path="q_values.json", save_results=False):
+def merge_learners(shared_q_values, player1, player2):
+    """
+    Method to merge the Q values the Q learning agents changed since the last merge into a shared table, weighted by
+    the number of updates behind them.
+
+    Args:
+        shared_q_values(SharedQValues): Table shared by the agents.
+        player1(GoPlayer): Instance of player 1 agent.
+        player2(GoPlayer): Instance of player 2 agent.
+
+    """
+    for player in (player1, player2):
+        if player.type == "q-learner":
+            shared_q_values.merge_q_values(player.changed_q_values, player.update_counts)
+            player.changed_q_values.clear()
+            player.update_counts.clear()
+
+
+def get_saved_table(player1, player2, shared_q_values=None):
+    """
+    Method to get the table to save after training, and the Q values changed in it since the last checkpoint.
+
+    Args:
+        player1(GoPlayer): Instance of player 1 agent.
+        player2(GoPlayer): Instance of player 2 agent.
+        shared_q_values(SharedQValues): Table shared by the agents, None if only one agent learns. Defaults to None.
+
+    Returns:
+        (q_values, changed_q_values): The table and its changed Q values, None if no agent learns.
+
+    """
+    if shared_q_values is not None:
+        return shared_q_values, shared_q_values.changed_q_values
+    for player in (player1, player2):
+        if player.type == "q-learner":
+            return player.q_values, player.changed_q_values
+    return None
+
+
+def train(go, player1, player2, q_table_path="q_values.json", save_results=False, learn=True, checkpointer=None,
+          shared_q_values=None):
     """
     Method to train a Q learning agent by playing a series of games against another player.
 
@@ -19,7 +65,13 @@ def train(go, player1, player2, q_table_path="q_values.json", save_results=False
         player1(GoPlayer): Instance of player 1 agent.
         player2(GoPlayer): Instance of player 2 agent.
         q_table_path(str): Path to the Q table file. Defaults to "q_values.json".
-        save_results(bool): Whether to save the updated Q values after every game. Defaults to False.
+        save_results(bool): Whether to save the updated Q values. They are saved after every game, or when the
+            checkpointer is due if one is given. Defaults to False.
+        learn(bool): Whether the Q learning agents learn from the game. If not, their state histories are kept.
+            Defaults to True.
+        checkpointer(Checkpointer): Checkpointer that saves the Q values in the background. Defaults to None.
+        shared_q_values(SharedQValues): Table the Q learning agents merge their changes into after the game, and the
+            table that is saved. Needed to save the Q values when both agents learn. Defaults to None.
 
     Returns:
         (winner): Winner of the game.
@@ -47,24 +99,21 @@ def train(go, player1, player2, q_table_path="q_values.json", save_results=False
                 else:
                     print('The winner is {}'.format('X' if result == 1 else 'O'))
 
-            if (player1.type == "q-learner"):
+            if (player1.type == "q-learner") and learn:
                 player1.learn(result)
-            if (player2.type == "q-learner"):
+            if (player2.type == "q-learner") and learn:
                 player2.learn(result)
 
-            if save_results:
-                q_values = {}
-                if player1.type == "q-learner" and player2.type == "q-learner":
-                    q_values.update(player1.q_values)
-                    q_values.update(player2.updated_q_values)
-                elif player1.type == "q-learner":
-                    q_values = player1.q_values
-                elif player2.type == "q-learner":
-                    q_values = player2.q_values
+            if shared_q_values is not None and learn:
+                merge_learners(shared_q_values, player1, player2)
 
-                if q_values:
-                    with open(q_table_path, 'w') as q_values_file:
-                        json.dump(q_values, q_values_file)
+            saved_table = get_saved_table(player1, player2, shared_q_values) if save_results else None
+            if saved_table is not None and checkpointer is not None:
+                if checkpointer.record_game():
+                    checkpointer.save(*saved_table)
+            elif saved_table is not None and saved_table[0]:
+                dump_q_values(q_table_path, saved_table[0], flags=FLAG_CANONICAL,
+                              sequence=get_last_sequence(q_table_path))
 
             return result
 
@@ -99,59 +148,198 @@ def train(go, player1, player2, q_table_path="q_values.json", save_results=False
         x_move = not x_move # Players take turn
 
 
+_worker_players = None
+_worker_snapshot_version = None
+
+
+def _init_self_play_worker():
+    """
+    Method to seed the random ties of a self-play worker, so that forked workers do not all play the same games.
+    """
+    random.seed()
+
+
+def _play_games(snapshot_path, snapshot_version, num_games, board_size):
+    """
+    Method run by a self-play worker to play games between two Q learning agents using the latest table snapshot.
+
+    Args:
+        snapshot_path(str): Path of the binary Q table snapshot written by the learner.
+        snapshot_version(int): Version of the snapshot, the worker reloads the table when it changes.
+        num_games(int): Number of games to play.
+        board_size(int): Size of the Go board.
+
+    Returns:
+        (games): List of (black state history, white state history, result) of the games.
+
+    """
+    global _worker_players, _worker_snapshot_version
+    if _worker_snapshot_version != snapshot_version:
+        _worker_players = (QPlayer(1, snapshot_path, board_size=board_size),
+                           QPlayer(2, snapshot_path, board_size=board_size))
+        _worker_snapshot_version = snapshot_version
+
+    player1, player2 = _worker_players
+    games = []
+    for _ in range(num_games):
+        result = train(GO(board_size), player1, player2, learn=False)
+        games.append((player1.state_history, player2.state_history, result))
+        for player in _worker_players:
+            player.state_history = []
+            player.canonical_states = {}
+    return games
+
+
+def self_play(q_table_path=Q_TABLE_PATH, num_games=50000, num_workers=None, games_per_task=50, snapshot_interval=1000,
+              board_size=5, checkpointer=None, max_states=None):
+    """
+    Method to train a Q table with games played by worker processes. The workers play both sides with a snapshot of
+    the table and send the state histories back, the learner applies them to the table and writes a new snapshot for
+    the workers every snapshot_interval games.
+
+    Args:
+        q_table_path(str): Path to the Q table file. Defaults to "q_values.json".
+        num_games(int): Number of games to play. Defaults to 50000.
+        num_workers(int): Number of worker processes. Defaults to None (one per CPU core).
+        games_per_task(int): Number of games a worker plays before sending them back. Defaults to 50.
+        snapshot_interval(int): Number of games between snapshots of the table. Defaults to 1000.
+        board_size(int): Size of the Go board. Defaults to 5.
+        checkpointer(Checkpointer): Checkpointer that saves the table in the background while training, None to only
+            save it at the end. Defaults to None.
+        max_states(int): Maximum number of states in the table of the learner, None for no limit. Defaults to None.
+
+    Returns:
+        (results): Number of draws, black wins and white wins.
+
+    """
+    num_workers = num_workers or os.cpu_count() or 1
+    learner = QPlayer(1, q_table_path, board_size=board_size, batch_learning=True, max_states=max_states)
+    snapshot_path = q_table_path + ".snapshot"
+    snapshot_version = 0
+    dump_q_values(snapshot_path, learner.q_values, board_size, FLAG_CANONICAL)
+
+    results = [0, 0, 0]
+    num_submitted = 0
+    num_finished = 0
+    last_snapshot = 0
+    start = time.time()
+    with ProcessPoolExecutor(num_workers, initializer=_init_self_play_worker) as executor:
+        pending = set()
+        while num_finished < num_games:
+            # Two tasks per worker keep the workers busy while the learner applies the games.
+            while num_submitted < num_games and len(pending) < 2 * num_workers:
+                count = min(games_per_task, num_games - num_submitted)
+                pending.add(executor.submit(_play_games, snapshot_path, snapshot_version, count, board_size))
+                num_submitted += count
+
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                for black_history, white_history, result in future.result():
+                    learner.backup(black_history, learner.get_reward(result, 1))
+                    learner.backup(white_history, learner.get_reward(result, 2))
+                    learner.canonical_states = {}
+                    learner.updated_q_values = {}
+                    results[result] += 1
+                    num_finished += 1
+                    if checkpointer is not None and checkpointer.record_game():
+                        checkpointer.save(learner.q_values, learner.changed_q_values)
+                    elif checkpointer is None:
+                        learner.changed_q_values = {}
+
+            if num_finished - last_snapshot >= snapshot_interval:
+                dump_q_values(snapshot_path, learner.q_values, board_size, FLAG_CANONICAL)
+                snapshot_version += 1
+                last_snapshot = num_finished
+                print("Games: {}. Games/sec: {:.1f}. Table: {}".format(num_finished,
+                                                                       num_finished / (time.time() - start),
+                                                                       learner.table_stats()))
+
+    if checkpointer is not None:
+        checkpointer.save(learner.q_values, learner.changed_q_values, full=True)
+        checkpointer.wait()
+    else:
+        learner.dump_values(q_table_path)
+    os.remove(snapshot_path)
+    print("Black Wins: {}. White Wins: {}. Draws: {}. Games/sec: {:.1f}".format(
+        results[1], results[2], results[0], num_games / (time.time() - start)))
+    return results
+
+
 if __name__ == "__main__":
-    MAX_BATCHES = 5
-
-    for i in range(MAX_BATCHES):
-        print("BATCH: {}".format(i))
-        MAX_GAMES = 10000
-        num_games = 0
-
-        q_path = Q_TABLE_PATH
-        piece_type = 1
-        player1 = QPlayer(piece_type, q_path)
-        player2 = QPlayer(3 - piece_type, q_path)
-        switch_sides = player2.type != "q-learner"
-        p1_wins = 0
-        p2_wins = 0
-        draws = 0
-
-        while num_games < MAX_GAMES:
-            print("Game Number: {}.".format(i * MAX_GAMES + num_games))
-            N = 5
-            go = GO(N)
-
-            result = train(go, player1, player2, q_path)
-            num_games += 1
-
-            if result == 1:
-                p1_wins += 1
-            elif result == 2:
-                p2_wins += 1
-            else:
-                draws += 1
-
-            if switch_sides:
-                piece_type = 3 - piece_type
-                player1, player2 = player2, player1
-
-                if player1.type == "q-learner":
-                    player1.set_piece_type(piece_type)
-
-                if player2.type == "q-learner":
-                    player2.set_piece_type(piece_type)
-
-        print("P1 Wins: {}. P2 Wins: {}. Draws: {}".format(p1_wins, p2_wins, draws))
-
-        q_values = {}
-        if player1.type == "q-learner" and player2.type == "q-learner":
-            q_values.update(player1.q_values)
-            q_values.update(player2.updated_q_values)
-        elif player1.type == "q-learner":
-            q_values = player1.q_values
-        elif player2.type == "q-learner":
-            q_values = player2.q_values
-
-        if q_values:
-            with open(q_path, 'w') as q_values_file:
-                json.dump(q_values, q_values_file)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", "-w", type=int, help="number of self-play worker processes, 0 to train in this "
+                        "process", default=0)
+    parser.add_argument("--games", "-g", type=int, help="number of self-play games", default=50000)
+    parser.add_argument("--snapshot-interval", "-s", type=int, help="number of games between table snapshots",
+                        default=1000)
+    parser.add_argument("--checkpoint-games", type=int, help="number of games between checkpoints", default=1000)
+    parser.add_argument("--checkpoint-seconds", type=float, help="number of seconds between checkpoints", default=None)
+    parser.add_argument("--max-states", type=int, help="maximum number of states in the table of a learner and in "
+                        "the shared table", default=None)
+    parser.add_argument("--prune", action="store_true", help="remove states with default Q values after every batch")
+    parser.add_argument("--merge-policy", "-m", choices=MERGE_POLICIES, help="how the Q values of the two learners "
+                        "are merged", default="last-writer")
+    args = parser.parse_args()
+
+    checkpointer = Checkpointer(Q_TABLE_PATH, interval_games=args.checkpoint_games,
+                                interval_seconds=args.checkpoint_seconds)
+    if args.workers > 0:
+        self_play(Q_TABLE_PATH, args.games, args.workers, snapshot_interval=args.snapshot_interval,
+                  checkpointer=checkpointer, max_states=args.max_states)
+    else:
+        MAX_BATCHES = 5
+
+        for i in range(MAX_BATCHES):
+            print("BATCH: {}".format(i))
+            MAX_GAMES = 10000
+            num_games = 0
+
+            q_path = Q_TABLE_PATH
+            piece_type = 1
+            player1 = QPlayer(piece_type, q_path, batch_learning=True, max_states=args.max_states)
+            player2 = QPlayer(3 - piece_type, q_path, batch_learning=True, max_states=args.max_states)
+            shared_q_values = SharedQValues.from_q_values(load_checkpoint(q_path), args.merge_policy,
+                                                          max_states=args.max_states)
+            switch_sides = player2.type != "q-learner"
+            p1_wins = 0
+            p2_wins = 0
+            draws = 0
+
+            while num_games < MAX_GAMES:
+                print("Game Number: {}.".format(i * MAX_GAMES + num_games))
+                N = 5
+                go = GO(N)
+
+                result = train(go, player1, player2, q_path, save_results=True, checkpointer=checkpointer,
+                               shared_q_values=shared_q_values)
+                num_games += 1
+
+                if result == 1:
+                    p1_wins += 1
+                elif result == 2:
+                    p2_wins += 1
+                else:
+                    draws += 1
+
+                if switch_sides:
+                    piece_type = 3 - piece_type
+                    player1, player2 = player2, player1
+
+                    if player1.type == "q-learner":
+                        player1.set_piece_type(piece_type)
+
+                    if player2.type == "q-learner":
+                        player2.set_piece_type(piece_type)
+
+            print("P1 Wins: {}. P2 Wins: {}. Draws: {}".format(p1_wins, p2_wins, draws))
+            for player in (player1, player2):
+                if player.type == "q-learner":
+                    if args.prune:
+                        player.prune_default_states()
+                    print("Table of player {}: {}".format(player.piece_type, player.table_stats()))
+
+            # The next batch loads the table, so it waits for the full checkpoint to be written.
+            checkpointer.save(shared_q_values, shared_q_values.changed_q_values, full=True)
+            checkpointer.wait()
+
+    checkpointer.close()
@@ -0,0 +1,102 @@
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+ENTRY_SIZE = 160 # Approximate memory used by one slot and its entry, in bytes
+
+
+class TranspositionTable():
+    """
+    Fixed size cache of search results keyed by position. Every bucket has two slots: a depth-preferred slot that keeps
+    the deepest result of the current search, and an always-replace slot that takes every other store.
+    """
+
+    def __init__(self, memory_mb=16):
+        """
+        Method to initialize the transposition table.
+
+        Args:
+            memory_mb(float): Memory budget of the table in megabytes. Defaults to 16.
+
+        """
+        self.num_buckets = max(1, int(memory_mb * 1024 * 1024) // (2 * ENTRY_SIZE))
+        self.slots = [None] * (2 * self.num_buckets)
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.cutoffs = 0
+        self.stores = 0
+
+    def new_search(self):
+        """
+        Method to mark the start of a new search, so that entries of earlier searches can be replaced in the
+        depth-preferred slots.
+        """
+        self.generation += 1
+
+    def clear(self):
+        """
+        Method to remove all the entries and reset the counters.
+        """
+        self.slots = [None] * (2 * self.num_buckets)
+        self.hits = 0
+        self.misses = 0
+        self.cutoffs = 0
+        self.stores = 0
+
+    def probe(self, key):
+        """
+        Method to look up the entry of a position.
+
+        Args:
+            key(int): Search key of the position.
+
+        Returns:
+            (depth, value, bound, move): The stored entry, None if the position is not in the table.
+
+        """
+        slot = (key % self.num_buckets) * 2
+        for entry in (self.slots[slot], self.slots[slot + 1]):
+            if entry is not None and entry[0] == key:
+                self.hits += 1
+                return entry[1:5]
+        self.misses += 1
+        return None
+
+    def store(self, key, depth, value, bound, move):
+        """
+        Method to store the result of a search.
+
+        Args:
+            key(int): Search key of the position.
+            depth(int): Depth the position was searched to.
+            value(float): Value found by the search.
+            bound(int): Whether the value is EXACT, a LOWER_BOUND or an UPPER_BOUND.
+            move(tuple): Best move found by the search.
+
+        """
+        slot = (key % self.num_buckets) * 2
+        entry = (key, depth, value, bound, move, self.generation)
+        deepest = self.slots[slot]
+        if deepest is None or deepest[0] == key or deepest[5] != self.generation or depth >= deepest[1]:
+            self.slots[slot] = entry
+        else:
+            self.slots[slot + 1] = entry
+        self.stores += 1
+
+    def stats(self):
+        """
+        Method to get the counters of the table.
+
+        Returns:
+            (stats): Dictionary with the hits, misses, cutoffs, stores and the number of filled slots.
+
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "cutoffs": self.cutoffs,
+            "stores": self.stores,
+            "filled": len(self.slots) - self.slots.count(None),
+            "slots": len(self.slots),
+        }
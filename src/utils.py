@@ -1,3 +1,10 @@
+from symmetry import get_symmetries
+
+
+ROTATE = 1 # Symmetry transform of a clockwise rotation by 90 degrees
+FLIPS = ((0, 6), (4, 2)) # FLIPS[flip_horizontally][flip_vertically] -> symmetry transform of the flips
+
+
 def get_board_from_state(state, board_size):
     """
     Method to get a board from an encoded state.
@@ -43,13 +50,7 @@ def get_rotated_state(state, size):
         (rotated_state): State rotated by 90 degrees.
 
     """
-    board = get_board_from_state(state, size)
-    rotated_board = [[0 for _ in range(size)] for _ in range(size)]
-    for i in range(size):
-        for j in range(size):
-            rotated_board[j][size - i - 1] = board[i][j]
-
-    return get_encoded_state(rotated_board, size)
+    return get_symmetries(size).transform_state(state, ROTATE)
 
 
 def get_flipped_state(state, size, flip_horizontally, flip_vertically):
@@ -66,16 +67,7 @@ def get_flipped_state(state, size, flip_horizontally, flip_vertically):
         (flipped_state): Horizontally/vertically flipped state.
 
     """
-    board = get_board_from_state(state, size)
-    flipped_board = [[0 for _ in range(size)] for _ in range(size)]
-
-    for i in range(size):
-        for j in range(size):
-            target_row = size - i - 1 if flip_vertically else i
-            target_column = size - j - 1 if flip_horizontally else j
-            flipped_board[target_row][target_column] = board[i][j]
-
-    return get_encoded_state(flipped_board, size)
+    return get_symmetries(size).transform_state(state, FLIPS[flip_horizontally][flip_vertically])
 
 
 def get_equivalent_action(action, board_size, flip_horizontally=False, flip_vertically=False, num_rotations=0,
@@ -95,27 +87,12 @@ def get_equivalent_action(action, board_size, flip_horizontally=False, flip_vert
         (equivalent_action): Action after flips and rotations.
 
     """
-    equivalent_action = (action[0], action[1])
-
+    symmetries = get_symmetries(board_size)
+    flip = FLIPS[flip_horizontally][flip_vertically]
+    rotation = num_rotations % 4
     if backwards:
-        for _ in range(num_rotations):
-            equivalent_action = (equivalent_action[1], board_size - equivalent_action[0] - 1)
-
-        if flip_vertically:
-            equivalent_action = (board_size - equivalent_action[0] - 1, equivalent_action[1])
-
-        if flip_horizontally:
-            equivalent_action = (equivalent_action[0], board_size - equivalent_action[1] - 1)
-
+        transform = symmetries.compositions[rotation][flip]
     else:
-        if flip_horizontally:
-            equivalent_action = (equivalent_action[0], board_size - equivalent_action[1] - 1)
-
-        if flip_vertically:
-            equivalent_action = (board_size - equivalent_action[0] - 1, equivalent_action[1])
-
-        for _ in range(num_rotations):
-            equivalent_action = (equivalent_action[1], board_size - equivalent_action[0] - 1)
-
+        transform = symmetries.compositions[flip][rotation]
 
-    return equivalent_action
+    return symmetries.transform_action((action[0], action[1]), transform)